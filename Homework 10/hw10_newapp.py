@@ -1,12 +1,15 @@
-from flask import Flask, request
+from flask import Flask, request, jsonify
 from google.cloud import storage, logging, pubsub_v1
+from google.cloud.pubsub_v1.publisher.exceptions import FlowControlLimitError
 from google.cloud.sql.connector import Connector
 import os
+import threading
 from dotenv import load_dotenv
 from datetime import datetime
 import pymysql
 import sqlalchemy
 from sqlalchemy import text
+from requests.adapters import HTTPAdapter
 
 app = Flask(__name__)
 
@@ -106,19 +109,59 @@ class PubSub:
 
         project_id = "ds-561-first-project"
 
-        self.pub_client = pubsub_v1.PublisherClient()
+        # Messages are batched by the client and sent from its own threads; past
+        # max_outstanding unsent messages, publish() drops instead of queueing
+        batch_settings = pubsub_v1.types.BatchSettings(max_messages=100, max_bytes=1024 * 1024, max_latency=0.05)
+        flow_control = pubsub_v1.types.PublishFlowControl(
+            message_limit=1000, limit_exceeded_behavior=pubsub_v1.types.LimitExceededBehavior.ERROR)
+        self.pub_client = pubsub_v1.PublisherClient(
+            batch_settings=batch_settings, publisher_options=pubsub_v1.types.PublisherOptions(flow_control=flow_control))
         self.topic_path = self.pub_client.topic_path(project_id, topic_name)
 
         self.logger = Logger()
-
+        self.lock = threading.Lock()
+        self.submitted = 0
+        self.published = 0
+        self.failed = 0
+        self.dropped = 0
+
+    # Returns without waiting for Pub/Sub; on_done counts the outcome and logs only failures,
+    # so a flood of banned requests doesn't turn into one Cloud Logging call per message
     def publish(self, message):
         try:
             data = message.encode('utf-8')
             future = self.pub_client.publish(self.topic_path, data)
-            message_id = future.result()
-            self.logger.log(f"Message published with ID: {message_id}")
+        except FlowControlLimitError:
+            self.count("dropped")
+            return
         except Exception as e:
+            self.count("submitted")
+            self.count("failed")
             self.logger.log(f"PubSub Notification Failed: {str(e)}")
+            return
+        # Recent client versions report the limit through an already failed future
+        if future.done() and isinstance(future.exception(), FlowControlLimitError):
+            self.count("dropped")
+            return
+        self.count("submitted")
+        future.add_done_callback(self.on_done)
+
+    def on_done(self, future):
+        error = future.exception()
+        if error is None:
+            self.count("published")
+            return
+        self.count("failed")
+        self.logger.log(f"PubSub Notification Failed: {str(error)}")
+
+    def count(self, counter):
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self):
+        with self.lock:
+            return {"submitted": self.submitted, "published": self.published, "failed": self.failed,
+                    "dropped": self.dropped, "outstanding": self.submitted - self.published - self.failed}
 
 
 class DatabaseManager:
@@ -273,6 +316,12 @@ class AppService:
         self.pubsub = PubSub()
         self.db_manager = DatabaseManager()
 
+        # One storage client for the whole process, with a keep-alive connection pool
+        # sized for concurrent requests, instead of a new client per request
+        self.storage_client = storage.Client()
+        self.storage_client._http.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=32))
+        self.bucket = self.storage_client.bucket('serena-hw10-bucket')
+
     def handle_request(self, filename, request_method, headers):
         country = headers.get("X-country")
         client_ip = headers.get("X-client-IP")
@@ -303,9 +352,7 @@ class AppService:
                 return "Permission Denied", error_code
 
             try:
-                storage_client = storage.Client()
-                bucket = storage_client.bucket('serena-hw10-bucket')
-                blob = bucket.blob(requested_file)
+                blob = self.bucket.blob(requested_file)
                 file_content = blob.download_as_text()
                 self.logger.log(f"200: {requested_file}")
                 self.db_manager.handle_database(country, client_ip, gender, age, income, is_banned, time_of_day, requested_file, error_code)
@@ -325,6 +372,11 @@ class AppService:
 # Flask route handling
 service = AppService()
 
+# Counts of Pub/Sub messages submitted, published, failed and dropped since startup
+@app.route('/publish_stats')
+def publish_stats():
+    return jsonify(service.pubsub.stats())
+
 @app.route('/', defaults={'path': ''}, methods=['GET', 'POST', 'PUT', 'DELETE', 'HEAD', 'CONNECT', 'OPTIONS', 'TRACE', 'PATCH'])
 @app.route('/<path:filename>', methods=['GET', 'POST', 'PUT', 'DELETE', 'HEAD', 'CONNECT', 'OPTIONS', 'TRACE', 'PATCH'])
 def app_one(filename):
@@ -1,5 +1,7 @@
+import argparse
 from google.cloud import pubsub_v1
 from google.cloud.logging import Client as LoggingClient
+from batch_subscriber import BatchingSubscriber, create_sink, subscribe_batched
 
 
 
@@ -21,16 +23,39 @@ def callback(message):
         print(f"Error processing message: {str(e)}")
 
 
-with subscriber:
-    streaming_pull_future = subscriber.subscribe(subscription_path, callback=callback)
-        
-    print(f"Listening for messages on {subscription_path}...")
-            
-    try:
-        streaming_pull_future.result()
-    except Exception as e:
-        print(f"Error receiving messages: {str(e)}")
-        streaming_pull_future.cancel()
-        
-        
-
+def main():
+    parser = argparse.ArgumentParser(description="Receive forbidden-request events")
+    parser.add_argument("--sink", choices=["print", "file", "sqlite"], default="print",
+                        help="print and ack each message, or write them to a file/SQLite database in batches")
+    parser.add_argument("--sink_path", default="events.db", help="File or database the batches are written to")
+    parser.add_argument("--project_id", default=project_id)
+    parser.add_argument("--subscription_id", default=subscription_id)
+    parser.add_argument("--batch_size", type=int, default=500)
+    parser.add_argument("--max_delay", type=float, default=1.0, help="Seconds a partial batch waits before it is written")
+    parser.add_argument("--max_messages", type=int, default=1000, help="Flow control: unacked messages held at once")
+    parser.add_argument("--max_bytes", type=int, default=100 * 1024 * 1024, help="Flow control: unacked bytes held at once")
+    parser.add_argument("--workers", type=int, default=8, help="Threads running the message callback")
+    parser.add_argument("--report_every", type=float, default=10.0)
+    args = parser.parse_args()
+    path = subscriber.subscription_path(args.project_id, args.subscription_id)
+
+    with subscriber:
+        if args.sink == "print":
+            streaming_pull_future = subscriber.subscribe(path, callback=callback)
+        else:
+            handler = BatchingSubscriber(create_sink(args.sink, args.sink_path), batch_size=args.batch_size,
+                                         max_delay=args.max_delay, report_every=args.report_every)
+            streaming_pull_future = subscribe_batched(subscriber, path, handler, max_messages=args.max_messages,
+                                                      max_bytes=args.max_bytes, workers=args.workers)
+
+        print(f"Listening for messages on {path}...")
+
+        try:
+            streaming_pull_future.result()
+        except Exception as e:
+            print(f"Error receiving messages: {str(e)}")
+            streaming_pull_future.cancel()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,14 @@
-import numpy as np
+import os
 from google.cloud import storage
-import re
+from pagerank_engine import csr_pagerank
+from crawler import PAGES_PREFIX, page_name, parse_links, crawl_graph
+from graph_snapshot import save_snapshot, load_snapshot
+from link_stats import LinkStatistics
+from ranking import top_k
+
+
+# Local cache of the built link graph; delete it to force a fresh crawl
+SNAPSHOT_PATH = "hw2_graph.snapshot"
 
 
 # Directed Graph class
@@ -9,17 +17,33 @@ class DiGraph:
     #initialize empty graph
     def __init__(self):
         self.graph = {}
+        # Reverse adjacency, kept in step with self.graph by add_node/add_edge
+        self.reverse_graph = {}
 
     def add_node(self, node):
         # Adds a node to the graph if it doesn't already exist
         if node not in self.graph:
             self.graph[node] = set()
+            self.reverse_graph[node] = set()
 
     def add_edge(self, src_node, dst_node):
         #Adds a directed edge from src_node to dst_node
         self.add_node(src_node)
         self.add_node(dst_node)
         self.graph[src_node].add(dst_node)
+        self.reverse_graph[dst_node].add(src_node)
+
+    def remove_edge(self, src_node, dst_node):
+        #Removes the directed edge from src_node to dst_node if it exists
+        self.graph.get(src_node, set()).discard(dst_node)
+        self.reverse_graph.get(dst_node, set()).discard(src_node)
+
+    def remove_node(self, node):
+        #Removes a node along with all of its incoming and outgoing edges
+        for dst_node in self.graph.pop(node, set()):
+            self.reverse_graph[dst_node].discard(node)
+        for src_node in self.reverse_graph.pop(node, set()):
+            self.graph[src_node].discard(node)
 
     def get_outgoing_nodes(self, node):
         #Returns nodes that the given node points to
@@ -27,7 +51,15 @@ class DiGraph:
 
     def get_incoming_nodes(self, node):
         #Returns nodes that point to the given node
-        return {k for k, v in self.graph.items() if node in v}
+        return self.reverse_graph.get(node, set())
+
+    def out_degree(self, node):
+        #Returns the number of outgoing links of the given node
+        return len(self.graph.get(node, ()))
+
+    def in_degree(self, node):
+        #Returns the number of incoming links of the given node
+        return len(self.reverse_graph.get(node, ()))
 
     def nodes(self):
         #Returns all nodes in the graph
@@ -48,25 +80,23 @@ def initialize_storage_client(bucket_name):
 
 # Iterates over each file in the specified GCS bucket, extracts outgoing links from each file's content, 
 # constructs a directed graph based on these links, and returns the graph along with statistics on the links
-def build_graph(bucket):
+# graph_class can be DiGraph or CompactDiGraph; both expose the same node/edge API
+def build_graph(bucket, graph_class=DiGraph):
     outgoing_links = []
     incoming_links = {}
-    G = DiGraph()
+    G = graph_class()
     
     #Filtering for valid files within a specified directory
-    blobs = list(bucket.list_blobs(prefix="Serena_Directory/ds561_hw2_pythonfiles/"))
-    valid_files = set(blob.name.split("/")[-1].replace(".html", "") for blob in blobs)
-    
-    #identify links within the HTML content
-    link_pattern = re.compile(r'<a\s+href="([^"]+)"', re.IGNORECASE)
+    blobs = list(bucket.list_blobs(prefix=PAGES_PREFIX))
+    valid_files = set(page_name(blob.name) for blob in blobs)
 
     for blob in blobs:
-        content = blob.download_as_text()
+        content = blob.download_as_bytes()
         
-        links = [match.group(1).replace(".html", "") for match in link_pattern.finditer(content)]
+        links = parse_links(content)
         links = [link for link in links if link in valid_files]
         
-        file_name = blob.name.split("/")[-1].replace(".html", "")
+        file_name = page_name(blob.name)
         outgoing_links.append(len(links))
         
         G.add_node(file_name)
@@ -74,37 +104,29 @@ def build_graph(bucket):
             G.add_edge(file_name, link)
             
     for node in G.nodes():
-        incoming_links[node] = len(G.get_incoming_nodes(node))
+        incoming_links[node] = G.in_degree(node)
         
     return G, outgoing_links, incoming_links
 
 #Prints statistics about the number of incoming and outgoing links for each node in the graph
-def print_statistics(G):
-    outgoing_links = [len(G.get_outgoing_nodes(node)) for node in G.nodes()]
-    incoming_links = {node: len(G.get_incoming_nodes(node)) for node in G.nodes()}
-
-    avg_outgoing = np.mean(outgoing_links)
-    median_outgoing = np.median(outgoing_links)
-    max_outgoing = np.max(outgoing_links)
-    min_outgoing = np.min(outgoing_links)
-    quintiles_outgoing = np.percentile(outgoing_links, [20, 40, 60, 80, 100])
-
-    avg_incoming = np.mean(list(incoming_links.values()))
-    median_incoming = np.median(list(incoming_links.values()))
-    max_incoming = np.max(list(incoming_links.values()))
-    min_incoming = np.min(list(incoming_links.values()))
-    quintiles_incoming = np.percentile(list(incoming_links.values()), [20, 40, 60, 80, 100])
-
-    print("Average outgoing:", avg_outgoing)
-    print("Median outgoing:", median_outgoing)
-    print("Max outgoing:", max_outgoing)
-    print("Min outgoing:", min_outgoing)
-    print("Quintiles outgoing:", quintiles_outgoing)
-    print("Average incoming:", avg_incoming)
-    print("Median incoming:", median_incoming)
-    print("Max incoming:", max_incoming)
-    print("Min incoming:", min_incoming)
-    print("Quintiles incoming:", quintiles_incoming)
+#Uses the LinkStatistics gathered by the crawler when given, otherwise streams the degrees from G
+def print_statistics(G, stats=None):
+    if stats is None:
+        stats = LinkStatistics().add_graph(G)
+
+    outgoing = stats.outgoing
+    incoming = stats.incoming
+
+    print("Average outgoing:", outgoing.mean())
+    print("Median outgoing:", outgoing.median())
+    print("Max outgoing:", outgoing.max)
+    print("Min outgoing:", outgoing.min)
+    print("Quintiles outgoing:", outgoing.percentile([20, 40, 60, 80, 100]))
+    print("Average incoming:", incoming.mean())
+    print("Median incoming:", incoming.median())
+    print("Max incoming:", incoming.max)
+    print("Min incoming:", incoming.min)
+    print("Quintiles incoming:", incoming.percentile([20, 40, 60, 80, 100]))
 
 #Calculates the PageRank of each node in the graph using an iterative method
 #Returns a dictionary with nodes as keys and their corresponding PageRank values as values
@@ -112,14 +134,16 @@ def original_iterative_pagerank(G, damping=0.85, max_iter=10000):
     N = len(G.nodes())
     pr = {node: 1.0/N for node in G.nodes()}
 
+    dangling_nodes = [node for node in G.nodes() if G.out_degree(node) == 0]
+
     for _ in range(max_iter):
         new_pr = {}
+        #distribute the PageRank of dangling nodes equally among all nodes in the graph
+        dangling_pr = sum(pr[node] for node in dangling_nodes) / N
         for node in G.nodes():
             # For each node, consider the nodes linking to it (predecessors)
             preds = G.get_incoming_nodes(node)
-            #distribute the PageRank of dangling nodes equally among all nodes in the graph
-            dangling_pr = sum(pr[pred] for pred in G.nodes() if not G.get_outgoing_nodes(pred)) / N
-            total_for_node = sum(pr[pred] / len(G.get_outgoing_nodes(pred)) if G.get_outgoing_nodes(pred) else dangling_pr for pred in preds)
+            total_for_node = sum(pr[pred] / G.out_degree(pred) if G.out_degree(pred) else dangling_pr for pred in preds)
             new_pr[node] = (1 - damping)/N + damping * total_for_node
 
         # Normalization step
@@ -138,17 +162,24 @@ def original_iterative_pagerank(G, damping=0.85, max_iter=10000):
 
 def main():
     
-    bucket = initialize_storage_client("serena_ds561_hw2_bucket")
-    # Construct graph of the pages
-    G, outgoing_links, incoming_links = build_graph(bucket)
+    stats = None
+    if os.path.exists(SNAPSHOT_PATH):
+        # Reuse the graph from the last crawl instead of downloading every page again
+        G = load_snapshot(SNAPSHOT_PATH)
+    else:
+        bucket = initialize_storage_client("serena_ds561_hw2_bucket")
+        # Construct graph of the pages, downloading them concurrently
+        stats = LinkStatistics()
+        G, outgoing_links, incoming_links = crawl_graph(bucket, DiGraph, max_workers=32, stats=stats)
+        save_snapshot(G, SNAPSHOT_PATH)
 
     # Average, Median, Max, Min and Quintiles of incoming and outgoing links across all the files
-    print_statistics(G)
+    print_statistics(G, stats)
     
 
-    # Code the original iterative pagerank algorithm
-    pagerank_iterative = original_iterative_pagerank(G)
-    top_pages_iterative = sorted(pagerank_iterative.items(), key=lambda x: x[1], reverse=True)[:5]
+    # Iterative pagerank, computed with the vectorized CSR engine
+    pagerank_iterative = csr_pagerank(G)
+    top_pages_iterative = top_k(pagerank_iterative, 5)
     print("Top 5 pages by iterative PageRank:", top_pages_iterative)
 
 if __name__ == "__main__":
@@ -0,0 +1,85 @@
+import argparse
+import random
+import re
+import time
+from link_extractor import extract_links
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+
+# Compares the byte-level link extractor with the two approaches it replaces:
+# the str regex from the original build_graph and the BeautifulSoup parse from hw7_app.py
+
+
+#Generates pages shaped like the bucket's HTML files
+def make_pages(num_pages, max_links, seed=0):
+    rng = random.Random(seed)
+    pages = []
+    for _ in range(num_pages):
+        body = []
+        for _ in range(rng.randint(0, max_links)):
+            body.append("<p>" + " ".join("lorem" for _ in range(rng.randint(5, 40))) + "</p>")
+            body.append(f'<a HREF="{rng.randrange(num_pages)}.html">link</a>')
+        pages.append(("<!DOCTYPE html>\n<html>\n<body>\n" + "\n".join(body) + "\n</body>\n</html>\n").encode("utf-8"))
+    return pages
+
+
+#The original build_graph path: decode to str, then run a str regex
+def regex_on_text(pages):
+    link_pattern = re.compile(r'<a\s+href="([^"]+)"', re.IGNORECASE)
+    total = 0
+    for data in pages:
+        content = data.decode("utf-8")
+        links = [match.group(1).replace(".html", "") for match in link_pattern.finditer(content)]
+        total += len(links)
+    return total
+
+
+#The hw7_app.py ExtractLinksFn path: a full BeautifulSoup parse per page
+def beautiful_soup(pages):
+    total = 0
+    for data in pages:
+        soup = BeautifulSoup(data.decode("utf-8"), 'html.parser')
+        total += len([a_tag['href'].strip().lstrip('/') for a_tag in soup.find_all('a', href=True)])
+    return total
+
+
+#The shared byte-level extractor
+def byte_extractor(pages):
+    total = 0
+    for data in pages:
+        total += len(list(extract_links(data)))
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark link extraction approaches")
+    parser.add_argument("-n", "--num_pages", type=int, default=10000)
+    parser.add_argument("-l", "--max_links", type=int, default=250)
+    parser.add_argument("-r", "--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = make_pages(args.num_pages, args.max_links)
+    total_mb = sum(len(data) for data in pages) / 1e6
+    print(f"{len(pages)} pages, {total_mb:.1f} MB")
+
+    approaches = [("regex on decoded text", regex_on_text), ("byte extractor", byte_extractor)]
+    if BeautifulSoup is not None:
+        approaches.insert(1, ("BeautifulSoup", beautiful_soup))
+    else:
+        print("bs4 is not installed, skipping BeautifulSoup")
+
+    # Best of --repeat runs, to keep scheduler noise out of the comparison
+    for name, func in approaches:
+        elapsed = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            links = func(pages)
+            elapsed = min(elapsed, time.perf_counter() - start)
+        print(f"{name:24s} {elapsed:8.3f}s  {total_mb / elapsed:8.1f} MB/s  {links} links")
+
+if __name__ == "__main__":
+    main()
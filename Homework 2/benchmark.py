@@ -0,0 +1,130 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import time
+from multiprocessing import Pool
+import numpy as np
+from crawler import PAGES_PREFIX, LocalDirectoryBucket, add_page_links, fetch_all, page_name
+from compact_graph import CompactDiGraph
+from link_stats import LinkStatistics
+from pagerank_engine import compile_csr, power_iteration
+
+
+# Benchmark harness for the Homework 2 pipeline
+# Generates synthetic link corpora shaped like the bucket (N.html pages with power-law
+# in-degrees) as local directories, then times each stage of a crawl against them:
+# listing, download/parse, graph build, degree statistics and PageRank. Every corpus
+# size runs in its own worker process so peak RSS is measured per size. Results are
+# written as JSON so runs from different commits can be diffed.
+
+
+#Writes `num_pages` HTML pages under root/PAGES_PREFIX, unless a complete corpus is already there
+#Out-degrees are uniform in 0..2*avg_links; targets follow a Pareto law, so a few pages get most links
+def generate_corpus(root, num_pages, avg_links=20, alpha=1.2, seed=0):
+    directory = os.path.join(root, PAGES_PREFIX)
+    marker = os.path.join(root, "corpus.json")
+    if os.path.exists(marker):
+        with open(marker) as f:
+            if json.load(f) == {"num_pages": num_pages, "avg_links": avg_links, "alpha": alpha, "seed": seed}:
+                return
+    os.makedirs(directory, exist_ok=True)
+
+    rng = np.random.default_rng(seed)
+    ranks = rng.permutation(num_pages)
+    for page in range(num_pages):
+        num_links = rng.integers(0, 2 * avg_links + 1)
+        targets = ranks[(rng.pareto(alpha, num_links) * num_pages / 100).astype(np.int64) % num_pages]
+        body = "\n".join(f'<a HREF="{target}.html">page {target}</a>' for target in targets)
+        with open(os.path.join(directory, f"{page}.html"), "w") as f:
+            f.write(f"<!DOCTYPE html>\n<html>\n<body>\n{body}\n</body>\n</html>\n")
+
+    with open(marker, "w") as f:
+        json.dump({"num_pages": num_pages, "avg_links": avg_links, "alpha": alpha, "seed": seed}, f)
+
+
+#Returns the peak resident set size of this process so far, in MB
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak / 1e6 if platform.system() == "Darwin" else peak / 1e3
+
+
+#Times every stage for one corpus and returns the measurements as a dict
+#Each stage calls the same functions crawl_graph, print_statistics and csr_pagerank use,
+#one after the other instead of interleaved, so they can be timed separately
+def run_size(config):
+    root, num_pages, avg_links, max_workers = config
+    generate_corpus(root, num_pages, avg_links)
+    bucket = LocalDirectoryBucket(root)
+    result = {"num_pages": num_pages, "avg_links": avg_links, "stages": {}}
+
+    def record(stage, start):
+        result["stages"][stage] = {"seconds": time.perf_counter() - start, "peak_rss_mb": peak_rss_mb()}
+
+    start = time.perf_counter()
+    blobs = list(bucket.list_blobs(prefix=PAGES_PREFIX))
+    record("listing", start)
+
+    start = time.perf_counter()
+    pages = [(file_name, links) for _, file_name, links in fetch_all(blobs, max_workers=max_workers, progress_every=max(len(blobs), 1))]
+    record("download_parse", start)
+
+    start = time.perf_counter()
+    valid_files = set(page_name(blob.name) for blob in blobs)
+    G = CompactDiGraph()
+    for file_name, links in pages:
+        add_page_links(G, file_name, links, valid_files)
+    G.freeze()
+    record("graph_build", start)
+    result["num_edges"] = G.num_edges()
+    del pages
+
+    start = time.perf_counter()
+    LinkStatistics().add_graph(G)
+    record("degree_stats", start)
+
+    start = time.perf_counter()
+    _, iterations, _ = power_iteration(compile_csr(G))
+    record("pagerank", start)
+    result["pagerank_iterations"] = iterations
+    return result
+
+
+#Returns the current git commit, or None outside a checkout
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark graph build, statistics and PageRank on synthetic corpora")
+    parser.add_argument("-s", "--sizes", default="1000,10000", help="Comma-separated corpus sizes in pages, e.g. 1000,10000,100000")
+    parser.add_argument("-l", "--avg_links", type=int, default=20)
+    parser.add_argument("-d", "--data_dir", default="bench_corpora", help="Where generated corpora are kept between runs")
+    parser.add_argument("-w", "--max_workers", type=int, default=16)
+    parser.add_argument("-o", "--output", default="bench_results.json")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    configs = [(os.path.join(args.data_dir, f"pages_{size}"), size, args.avg_links, args.max_workers) for size in sizes]
+
+    # One fresh process per corpus, so peak RSS isn't carried over from a smaller run
+    with Pool(processes=1, maxtasksperchild=1) as pool:
+        results = pool.map(run_size, configs, chunksize=1)
+
+    report = {"commit": git_commit(), "python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count(), "results": results}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for result in results:
+        stages = "  ".join(f"{stage} {values['seconds']:.2f}s" for stage, values in result["stages"].items())
+        print(f"{result['num_pages']} pages, {result['num_edges']} edges: {stages}  peak {max(v['peak_rss_mb'] for v in result['stages'].values()):.0f} MB")
+    print(f"Wrote {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+from array import array
+import numpy as np
+
+
+# Directed Graph class backed by integer ids and flat edge buffers
+# Page names are interned to dense int32 ids, and edges are appended to two
+# growable array('i') buffers. freeze() deduplicates them into CSR (outgoing)
+# and CSC (incoming) index arrays, which every query then reads from.
+class CompactDiGraph:
+
+    #initialize empty graph
+    def __init__(self):
+        self.names = []
+        self.ids = {}
+        self.src = array('i')
+        self.dst = array('i')
+        self.frozen = False
+
+    def add_node(self, node):
+        # Adds a node to the graph if it doesn't already exist and returns its id
+        node_id = self.ids.get(node)
+        if node_id is None:
+            self.thaw()
+            node_id = len(self.names)
+            self.ids[node] = node_id
+            self.names.append(node)
+            self.frozen = False
+        return node_id
+
+    def add_edge(self, src_node, dst_node):
+        #Adds a directed edge from src_node to dst_node
+        self.thaw()
+        self.src.append(self.add_node(src_node))
+        self.dst.append(self.add_node(dst_node))
+        self.frozen = False
+
+    # Builds a frozen graph directly from CSR/CSC arrays, e.g. memory-mapped from a snapshot
+    # The edge buffers are only materialized if the graph is modified afterwards
+    @classmethod
+    def from_csr(cls, names, indptr, indices, in_indptr, in_indices):
+        G = cls()
+        G.names = list(names)
+        G.ids = {name: i for i, name in enumerate(G.names)}
+        G.indptr = indptr
+        G.indices = indices
+        G.in_indptr = in_indptr
+        G.in_indices = in_indices
+        G.src = None
+        G.dst = None
+        G.frozen = True
+        return G
+
+    def thaw(self):
+        #Rebuilds the edge buffers from the CSR arrays of a graph created with from_csr
+        if self.src is None:
+            src = np.repeat(np.arange(len(self.names), dtype=np.int32), np.diff(self.indptr))
+            self.src = array('i', src.tobytes())
+            self.dst = array('i', np.asarray(self.indices, dtype=np.int32).tobytes())
+
+    def freeze(self):
+        #Builds the CSR/CSC views from the edge buffers, dropping duplicate edges
+        if self.frozen:
+            return self
+
+        N = len(self.names)
+        src = np.frombuffer(self.src, dtype=np.int32) if len(self.src) else np.zeros(0, dtype=np.int32)
+        dst = np.frombuffer(self.dst, dtype=np.int32) if len(self.dst) else np.zeros(0, dtype=np.int32)
+
+        # Sorting the combined key orders edges by source, then target
+        keys = np.unique(src.astype(np.int64) * N + dst)
+        src = (keys // N).astype(np.int32)
+        dst = (keys % N).astype(np.int32)
+
+        self.indptr = np.zeros(N + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=N), out=self.indptr[1:])
+        self.indices = dst
+
+        order = np.argsort(dst, kind='stable')
+        self.in_indptr = np.zeros(N + 1, dtype=np.int64)
+        np.cumsum(np.bincount(dst, minlength=N), out=self.in_indptr[1:])
+        self.in_indices = src[order]
+
+        # Keep the deduplicated edges so the buffers don't grow across refreezes
+        self.src = array('i', src.tobytes())
+        self.dst = array('i', dst.tobytes())
+        self.frozen = True
+        return self
+
+    def get_outgoing_ids(self, node_id):
+        #Returns the ids of the nodes that the given node id points to
+        self.freeze()
+        return self.indices[self.indptr[node_id]:self.indptr[node_id + 1]]
+
+    def get_incoming_ids(self, node_id):
+        #Returns the ids of the nodes that point to the given node id
+        self.freeze()
+        return self.in_indices[self.in_indptr[node_id]:self.in_indptr[node_id + 1]]
+
+    def get_outgoing_nodes(self, node):
+        #Returns nodes that the given node points to
+        if node not in self.ids:
+            return set()
+        return {self.names[i] for i in self.get_outgoing_ids(self.ids[node])}
+
+    def get_incoming_nodes(self, node):
+        #Returns nodes that point to the given node
+        if node not in self.ids:
+            return set()
+        return {self.names[i] for i in self.get_incoming_ids(self.ids[node])}
+
+    def out_degree(self, node):
+        #Returns the number of outgoing links of the given node
+        if node not in self.ids:
+            return 0
+        self.freeze()
+        node_id = self.ids[node]
+        return int(self.indptr[node_id + 1] - self.indptr[node_id])
+
+    def in_degree(self, node):
+        #Returns the number of incoming links of the given node
+        if node not in self.ids:
+            return 0
+        self.freeze()
+        node_id = self.ids[node]
+        return int(self.in_indptr[node_id + 1] - self.in_indptr[node_id])
+
+    def out_degrees(self):
+        #Returns the out-degree of every node, indexed by id
+        self.freeze()
+        return np.diff(self.indptr)
+
+    def in_degrees(self):
+        #Returns the in-degree of every node, indexed by id
+        self.freeze()
+        return np.diff(self.in_indptr)
+
+    def nodes(self):
+        #Returns all nodes in the graph
+        return self.names
+
+    def num_edges(self):
+        #Returns the number of distinct edges in the graph
+        self.freeze()
+        return len(self.indices)
+
+    def __str__(self):
+        #String representation of the graph
+        return "\n".join([f"{node} -> {', '.join(map(str, self.get_outgoing_nodes(node)))}" for node in self.names])
+
+
+#Copies any graph exposing the DiGraph API into a frozen CompactDiGraph
+def to_compact(G):
+    if isinstance(G, CompactDiGraph):
+        return G.freeze()
+    C = CompactDiGraph()
+    for node in G.nodes():
+        C.add_node(node)
+    for node in G.nodes():
+        for target in G.get_outgoing_nodes(node):
+            C.add_edge(node, target)
+    return C.freeze()
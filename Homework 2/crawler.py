@@ -0,0 +1,166 @@
+import base64
+import hashlib
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from link_extractor import extract_links
+
+
+PAGES_PREFIX = "Serena_Directory/ds561_hw2_pythonfiles/"
+
+#Returns the page name of a blob, e.g. "Serena_Directory/.../12.html" -> "12"
+def page_name(blob_name):
+    return blob_name.split("/")[-1].replace(".html", "")
+
+
+#Returns the page names linked from the given HTML content (bytes or str)
+def parse_links(content):
+    return list(extract_links(content))
+
+
+# Local stand-in for a GCS blob, backed by a file on disk
+# generation and md5_hash mirror the GCS metadata fields used by incremental rebuilds
+class LocalBlob:
+
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        self.generation = os.stat(path).st_mtime_ns
+
+    @property
+    def md5_hash(self):
+        return base64.b64encode(hashlib.md5(self.download_as_bytes()).digest()).decode("ascii")
+
+    def download_as_bytes(self):
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def download_as_text(self):
+        return self.download_as_bytes().decode("utf-8")
+
+
+# Local stand-in for a GCS bucket, so the crawler can run against a directory
+# Blob names are paths relative to root, with "/" separators like GCS
+class LocalDirectoryBucket:
+
+    def __init__(self, root):
+        self.root = root
+
+    def list_blobs(self, prefix=""):
+        blobs = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                name = os.path.relpath(path, self.root).replace(os.sep, "/")
+                if name.startswith(prefix):
+                    blobs.append(LocalBlob(name, path))
+        return sorted(blobs, key=lambda blob: blob.name)
+
+
+# Counts finished downloads and prints a line every `every` pages
+class Progress:
+
+    def __init__(self, total, every=500):
+        self.total = total
+        self.every = every
+        self.done = 0
+        self.failed = 0
+        self.start = time.time()
+
+    def update(self, failed=False):
+        self.done += 1
+        if failed:
+            self.failed += 1
+        if self.done % self.every == 0 or self.done == self.total:
+            elapsed = time.time() - self.start
+            print(f"Crawled {self.done}/{self.total} pages ({self.failed} failed) in {elapsed:.1f}s")
+
+
+#Downloads a blob, retrying with exponential backoff on errors
+def download_with_retry(blob, retries=3, backoff=0.5):
+    for attempt in range(retries + 1):
+        try:
+            return blob.download_as_bytes()
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * (2 ** attempt))
+
+
+#Downloads and parses one blob, returning its page name and outgoing links
+def fetch_links(blob, retries=3, backoff=0.5):
+    content = download_with_retry(blob, retries=retries, backoff=backoff)
+    return page_name(blob.name), parse_links(content)
+
+
+#Downloads and parses blobs on a bounded thread pool, yielding (blob, page name, links)
+#in completion order. Pages that still fail after their retries are reported and skipped.
+#At most max_workers * 2 blobs are in flight; the next one is submitted as each finishes,
+#so memory stays proportional to the pool size rather than the bucket size.
+def fetch_all(blobs, max_workers=16, retries=3, backoff=0.5, progress_every=500):
+    progress = Progress(len(blobs), every=progress_every)
+    pending_blobs = iter(blobs)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+
+        def submit_next():
+            blob = next(pending_blobs, None)
+            if blob is not None:
+                futures[executor.submit(fetch_links, blob, retries, backoff)] = blob
+
+        for _ in range(max_workers * 2):
+            submit_next()
+
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                blob = futures.pop(future)
+                submit_next()
+                try:
+                    file_name, links = future.result()
+                except Exception as e:
+                    print(f"Error occurred downloading {blob.name}: {e}")
+                    progress.update(failed=True)
+                    continue
+
+                yield blob, file_name, links
+                progress.update()
+
+
+#Adds a page and its edges to G, keeping only links to pages in valid_files
+#Returns the kept links
+def add_page_links(G, file_name, links, valid_files):
+    links = [link for link in links if link in valid_files]
+    G.add_node(file_name)
+    for link in links:
+        G.add_edge(file_name, link)
+    return links
+
+
+# Lists the bucket once, then downloads and parses pages on a bounded thread pool
+# Edges are added to the graph in the calling thread as each page finishes, so
+# the graph class doesn't need to be thread-safe. Returns the same tuple as build_graph.
+# If a LinkStatistics is passed, it is updated as each page is parsed.
+def crawl_graph(bucket, graph_class, prefix=PAGES_PREFIX, max_workers=16, retries=3, backoff=0.5, progress_every=500, stats=None):
+    outgoing_links = []
+    incoming_links = {}
+    G = graph_class()
+
+    #Filtering for valid files within a specified directory
+    blobs = list(bucket.list_blobs(prefix=prefix))
+    valid_files = set(page_name(blob.name) for blob in blobs)
+
+    for _, file_name, links in fetch_all(blobs, max_workers, retries, backoff, progress_every):
+        links = add_page_links(G, file_name, links, valid_files)
+        outgoing_links.append(len(links))
+        # Repeated hrefs are a single edge, so the stats count distinct targets like print_statistics does
+        if stats is not None:
+            stats.add_page(len(set(links)))
+
+    for node in G.nodes():
+        incoming_links[node] = G.in_degree(node)
+    if stats is not None:
+        stats.finish(G)
+
+    return G, outgoing_links, incoming_links
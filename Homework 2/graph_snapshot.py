@@ -0,0 +1,87 @@
+import struct
+import numpy as np
+from compact_graph import CompactDiGraph, to_compact
+
+
+# Snapshot file layout (all integers little-endian):
+#   header   magic, version, node count, edge count, names byte length (64 bytes)
+#   indptr   int64[N+1]  CSR offsets of outgoing edges
+#   indices  int32[E]    CSR targets
+#   in_indptr  int64[N+1]  CSC offsets of incoming edges
+#   in_indices int32[E]    CSC sources
+#   names    utf-8 page names joined by "\n"
+# Each array section starts on an 8-byte boundary so it can be memory-mapped in place.
+SNAPSHOT_MAGIC = b"DSGRAPH\0"
+SNAPSHOT_VERSION = 1
+HEADER_FORMAT = "<8sIIQQQ24x"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+
+#Rounds an offset up to the next 8-byte boundary
+def align(offset):
+    return (offset + 7) & ~7
+
+
+#Returns the byte offset of each section for a graph with N nodes and E edges
+def section_offsets(N, E):
+    offsets = {}
+    offset = HEADER_SIZE
+    for section, size in [("indptr", 8 * (N + 1)), ("indices", 4 * E), ("in_indptr", 8 * (N + 1)), ("in_indices", 4 * E), ("names", 0)]:
+        offsets[section] = offset
+        offset = align(offset + size)
+    return offsets
+
+
+#Writes the graph to a versioned binary snapshot file
+def save_snapshot(G, path):
+    C = to_compact(G)
+    N = len(C.names)
+    E = len(C.indices)
+    names = "\n".join(str(name) for name in C.names).encode("utf-8")
+    offsets = section_offsets(N, E)
+
+    with open(path, "wb") as f:
+        f.write(struct.pack(HEADER_FORMAT, SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0, N, E, len(names)))
+        for section, arr, dtype in [("indptr", C.indptr, "<i8"), ("indices", C.indices, "<i4"),
+                                    ("in_indptr", C.in_indptr, "<i8"), ("in_indices", C.in_indices, "<i4")]:
+            f.write(b"\0" * (offsets[section] - f.tell()))
+            f.write(np.asarray(arr, dtype=dtype).tobytes())
+        f.write(b"\0" * (offsets["names"] - f.tell()))
+        f.write(names)
+
+
+#Reads a snapshot header and checks that this code can load it
+def read_header(path):
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE:
+        raise ValueError(f"{path} is too short to be a graph snapshot")
+    magic, version, _, N, E, names_len = struct.unpack(HEADER_FORMAT, header)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError(f"{path} is not a graph snapshot")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {version} in {path} (expected {SNAPSHOT_VERSION})")
+    return N, E, names_len
+
+
+#Loads a snapshot as a frozen CompactDiGraph
+#The edge arrays are read-only numpy.memmap views, so they are paged in from the file on demand
+def load_snapshot(path):
+    N, E, names_len = read_header(path)
+    offsets = section_offsets(N, E)
+
+    def section(name, dtype, count):
+        if count == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", offset=offsets[name], shape=(count,))
+
+    indptr = section("indptr", "<i8", N + 1)
+    indices = section("indices", "<i4", E)
+    in_indptr = section("in_indptr", "<i8", N + 1)
+    in_indices = section("in_indices", "<i4", E)
+
+    with open(path, "rb") as f:
+        f.seek(offsets["names"])
+        names = f.read(names_len).decode("utf-8").split("\n") if N else []
+
+    return CompactDiGraph.from_csr(names, indptr, indices, in_indptr, in_indices)
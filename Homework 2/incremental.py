@@ -0,0 +1,112 @@
+import json
+import os
+from crawler import PAGES_PREFIX, page_name, fetch_all
+from graph_snapshot import save_snapshot
+from DS561_HW2_code import DiGraph, SNAPSHOT_PATH, initialize_storage_client
+
+
+# Manifest of the last crawl: for every blob, its generation, md5 and raw outgoing links
+# (before filtering against the bucket listing, so links to pages created later can be restored)
+MANIFEST_PATH = "hw2_manifest.json"
+
+
+#Loads the manifest written by the last crawl, or an empty one on the first run
+def load_manifest(path=MANIFEST_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+#Writes the manifest atomically so an interrupted refresh keeps the previous one
+def save_manifest(manifest, path=MANIFEST_PATH):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+
+#Returns True if the listed blob still matches its manifest entry
+#A new generation with identical content (same md5) doesn't need a download
+def is_unchanged(blob, entry):
+    if entry is None:
+        return False
+    if blob.generation == entry["generation"]:
+        return True
+    return blob.md5_hash is not None and blob.md5_hash == entry["md5"]
+
+
+#Rebuilds the link graph from the manifest alone, without touching the bucket
+def graph_from_manifest(manifest, graph_class):
+    G = graph_class()
+    valid_files = set(entry["page"] for entry in manifest.values())
+    for entry in manifest.values():
+        G.add_node(entry["page"])
+        for link in entry["links"]:
+            if link in valid_files:
+                G.add_edge(entry["page"], link)
+    return G
+
+
+# Brings G up to date with the bucket, downloading only new and changed pages
+# G must support remove_node/remove_edge (DiGraph does). If it is None, the graph of the
+# previous crawl is rebuilt from the manifest first. Edges are patched in place:
+#   deleted pages are removed with all their edges,
+#   new and changed pages get their outgoing edges replaced,
+#   unchanged pages that already linked to a newly created page gain that edge.
+# Returns the graph and a dict with the number of added/changed/deleted/unchanged pages.
+def incremental_build(bucket, G=None, graph_class=DiGraph, manifest_path=MANIFEST_PATH, prefix=PAGES_PREFIX, max_workers=16, retries=3, backoff=0.5, progress_every=500):
+    manifest = load_manifest(manifest_path)
+    if G is None:
+        G = graph_from_manifest(manifest, graph_class)
+
+    blobs = list(bucket.list_blobs(prefix=prefix))
+    listed = {blob.name: blob for blob in blobs}
+    valid_files = set(page_name(name) for name in listed)
+
+    deleted = [name for name in manifest if name not in listed]
+    to_fetch = [blob for blob in blobs if not is_unchanged(blob, manifest.get(blob.name))]
+    new_pages = set(page_name(blob.name) for blob in to_fetch if blob.name not in manifest)
+    stats = {"added": len(new_pages), "changed": len(to_fetch) - len(new_pages), "deleted": len(deleted), "unchanged": len(blobs) - len(to_fetch)}
+
+    for name in deleted:
+        G.remove_node(manifest.pop(name)["page"])
+
+    for name, blob in listed.items():
+        entry = manifest.get(name)
+        if entry is not None and entry["generation"] != blob.generation and is_unchanged(blob, entry):
+            # Same content under a new generation, only the manifest needs updating
+            entry["generation"] = blob.generation
+
+    for blob, file_name, links in fetch_all(to_fetch, max_workers, retries, backoff, progress_every):
+        for old_target in list(G.get_outgoing_nodes(file_name)):
+            G.remove_edge(file_name, old_target)
+        G.add_node(file_name)
+        for link in links:
+            if link in valid_files:
+                G.add_edge(file_name, link)
+        manifest[blob.name] = {"generation": blob.generation, "md5": blob.md5_hash, "page": file_name, "links": links}
+
+    # Links to pages that didn't exist at the last crawl were filtered out back then
+    if new_pages:
+        fetched = set(blob.name for blob in to_fetch)
+        for name, entry in manifest.items():
+            if name in fetched:
+                continue
+            for link in entry["links"]:
+                if link in new_pages:
+                    G.add_edge(entry["page"], link)
+
+    save_manifest(manifest, manifest_path)
+    return G, stats
+
+
+# Nightly refresh: patch the graph from the last crawl and rewrite the snapshot main() loads
+def main():
+    bucket = initialize_storage_client("serena_ds561_hw2_bucket")
+    G, stats = incremental_build(bucket, max_workers=32)
+    save_snapshot(G, SNAPSHOT_PATH)
+    print("Refreshed graph:", stats)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import re
+
+
+# Shared href extractor for the Homework 2 crawler and the Homework 7 Beam pipeline
+# (Homework 7 keeps a copy of this file next to hw7_app.py).
+# It scans the raw page bytes with a compiled bytes regex, so pages never have to be
+# decoded to str, and only the matched hrefs are turned into strings.
+
+# <a ... href="target"> with any attributes before href and either quote style.
+# Whitespace and leading "/" around the target are matched outside the group.
+LINK_PATTERN = re.compile(rb'<a\s[^>]*?href\s*=\s*["\']\s*/*([^"\'\s]+)\s*["\']', re.IGNORECASE)
+
+
+#Returns the raw href values in the page, as bytes
+def find_hrefs(data):
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return LINK_PATTERN.findall(memoryview(data))
+
+
+#Returns the normalized link targets in the page, so "/12.html" becomes "12"
+#(keep_suffix keeps the ".html"). skip_absolute drops http:// and https:// links.
+#The targets are joined, stripped of their suffix and decoded in one pass per page
+#rather than one string operation per link.
+def extract_links(data, keep_suffix=False, skip_absolute=False):
+    hrefs = find_hrefs(data)
+    if skip_absolute:
+        hrefs = [href for href in hrefs if href[:4].lower() != b"http"]
+    if not hrefs:
+        return []
+
+    joined = b"\n".join(hrefs) + b"\n"
+    if not keep_suffix:
+        joined = joined.replace(b".html\n", b"\n")
+    return joined[:-1].decode("utf-8", "replace").split("\n")
@@ -0,0 +1,118 @@
+import random
+import numpy as np
+
+
+# KLL-style quantile sketch
+# Items are kept in a stack of compactors; level h holds items of weight 2**h. When a
+# level overflows, it is sorted and every other item (from a random offset) moves up
+# a level, so memory stays O(k log(n/k)) while rank error stays around 1/k.
+class KLLSketch:
+
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.compactors = [[]]
+        self.rng = random.Random(seed)
+
+    def capacity(self, level):
+        # Lower levels get geometrically smaller capacities, with a floor of 2
+        depth = len(self.compactors) - level - 1
+        return max(2, int(self.k * (2 / 3) ** depth))
+
+    def update(self, value):
+        self.compactors[0].append(value)
+        level = 0
+        while len(self.compactors[level]) >= self.capacity(level):
+            if level + 1 == len(self.compactors):
+                self.compactors.append([])
+            items = sorted(self.compactors[level])
+            offset = self.rng.randint(0, 1)
+            self.compactors[level + 1].extend(items[offset::2])
+            self.compactors[level] = []
+            level += 1
+
+    def size(self):
+        return sum(len(items) for items in self.compactors)
+
+    def quantiles(self, qs):
+        weighted = sorted((value, 2 ** level) for level, items in enumerate(self.compactors) for value in items)
+        values = np.array([value for value, _ in weighted], dtype=np.float64)
+        cumulative = np.cumsum([weight for _, weight in weighted])
+        total = cumulative[-1]
+        positions = np.searchsorted(cumulative, np.asarray(qs, dtype=np.float64) / 100 * total)
+        return values[np.minimum(positions, len(values) - 1)]
+
+
+# Running summary of a stream of numbers: exact count, mean, min and max, plus
+# quantiles that are exact (np.percentile) until exact_limit values have been seen,
+# after which the stored values are folded into a KLLSketch and memory stays bounded
+class StreamingSummary:
+
+    def __init__(self, exact_limit=100000, sketch_k=200):
+        self.exact_limit = exact_limit
+        self.sketch_k = sketch_k
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.values = []
+        self.sketch = None
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+        if self.sketch is not None:
+            self.sketch.update(value)
+            return
+        self.values.append(value)
+        if len(self.values) > self.exact_limit:
+            self.sketch = KLLSketch(self.sketch_k)
+            for stored in self.values:
+                self.sketch.update(stored)
+            self.values = []
+
+    def is_exact(self):
+        return self.sketch is None
+
+    def mean(self):
+        return self.total / self.count if self.count else float("nan")
+
+    def percentile(self, qs):
+        if self.count == 0:
+            return np.full(len(np.atleast_1d(qs)), np.nan)
+        if self.sketch is None:
+            return np.percentile(self.values, qs)
+        # The sketch can't see the exact extremes, so pin the 0th/100th percentiles to them
+        result = self.sketch.quantiles(np.atleast_1d(qs)).astype(np.float64)
+        result[np.atleast_1d(qs) <= 0] = self.min
+        result[np.atleast_1d(qs) >= 100] = self.max
+        return result
+
+    def median(self):
+        return float(self.percentile([50])[0])
+
+
+# Link statistics gathered while the crawler runs
+# Out-degrees are streamed as each page is parsed. In-degrees are only final once
+# every page has been seen, so finish(G) streams them from the graph's reverse index.
+class LinkStatistics:
+
+    def __init__(self, exact_limit=100000, sketch_k=200):
+        self.outgoing = StreamingSummary(exact_limit, sketch_k)
+        self.incoming = StreamingSummary(exact_limit, sketch_k)
+
+    def add_page(self, num_outgoing):
+        self.outgoing.add(num_outgoing)
+
+    def finish(self, G):
+        for node in G.nodes():
+            self.incoming.add(G.in_degree(node))
+        return self
+
+    # Summarizes an already built graph, for when the pages weren't streamed through add_page
+    def add_graph(self, G):
+        for node in G.nodes():
+            self.add_page(G.out_degree(node))
+        return self.finish(G)
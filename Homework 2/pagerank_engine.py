@@ -0,0 +1,172 @@
+import numpy as np
+
+
+# Compressed sparse row view of a graph: node i's outgoing targets are
+# indices[indptr[i]:indptr[i+1]], and names[i] is the page name of node i
+class CSRGraph:
+
+    def __init__(self, names, indptr, indices):
+        self.names = names
+        self.indptr = indptr
+        self.indices = indices
+        self.num_nodes = len(names)
+        self.out_degree = np.diff(indptr).astype(np.int64)
+        # Row id of every edge, used to scatter contributions in a single bincount
+        self.sources = np.repeat(np.arange(self.num_nodes, dtype=np.int32), self.out_degree)
+
+    def num_edges(self):
+        return len(self.indices)
+
+    def incoming(self):
+        #Returns the incoming-edge (CSC) arrays in_indptr, in_indices, built on first use
+        if not hasattr(self, "in_indptr"):
+            order = np.argsort(self.indices, kind='stable')
+            self.in_indices = self.sources[order]
+            self.in_indptr = np.zeros(self.num_nodes + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.indices, minlength=self.num_nodes), out=self.in_indptr[1:])
+        return self.in_indptr, self.in_indices
+
+
+# Compiles a DiGraph into NumPy CSR index arrays
+# Node order follows G.nodes(), so names[i] maps a score index back to its page
+# Graphs that already hold frozen CSR arrays (CompactDiGraph) are used as they are
+def compile_csr(G):
+    if hasattr(G, "freeze"):
+        G.freeze()
+        return CSRGraph(G.names, G.indptr, G.indices)
+
+    names = list(G.nodes())
+    index_of = {name: i for i, name in enumerate(names)}
+
+    indptr = np.zeros(len(names) + 1, dtype=np.int64)
+    indices = []
+    for i, name in enumerate(names):
+        targets = G.get_outgoing_nodes(name)
+        indptr[i + 1] = indptr[i] + len(targets)
+        indices.extend(index_of[target] for target in targets)
+
+    return CSRGraph(names, indptr, np.asarray(indices, dtype=np.int32))
+
+
+#Applies the PageRank operator once: teleport + link contributions + dangling mass
+#spread evenly over all nodes. Its fixed point is the PageRank vector.
+def pagerank_step(csr, pr, damping=0.85):
+    N = csr.num_nodes
+    dangling = csr.out_degree == 0
+    inv_out = np.zeros(N)
+    inv_out[~dangling] = 1.0 / csr.out_degree[~dangling]
+
+    contrib = pr * inv_out
+    spread = np.bincount(csr.indices, weights=contrib[csr.sources], minlength=N)
+    dangling_pr = pr[dangling].sum() / N
+    return (1 - damping) / N + damping * (spread + dangling_pr)
+
+
+# Runs power iteration over a CSRGraph, starting from `start` (uniform if None)
+# Each sweep is one sparse mat-vec plus one dangling-mass term shared by every node
+# Returns the score vector, the number of sweeps and the final L1 change
+def power_iteration(csr, start=None, damping=0.85, max_iter=10000, tol=0.005):
+    N = csr.num_nodes
+    if N == 0:
+        return np.zeros(0), 0, 0.0
+
+    pr = np.full(N, 1.0 / N) if start is None else start / start.sum()
+    residual = float("inf")
+    iterations = 0
+    for iterations in range(1, max_iter + 1):
+        new_pr = pagerank_step(csr, pr, damping)
+        new_pr /= new_pr.sum()
+
+        # Check for convergence
+        residual = float(np.abs(new_pr - pr).sum())
+        pr = new_pr
+        if residual < tol:
+            break
+
+    return pr, iterations, residual
+
+
+# Runs power iteration over a CSRGraph and returns the score vector
+def pagerank_vector(csr, damping=0.85, max_iter=10000, tol=0.005):
+    pr, _, _ = power_iteration(csr, damping=damping, max_iter=max_iter, tol=tol)
+    return pr
+
+
+#Calculates the PageRank of each node with the vectorized CSR engine
+#Returns a dictionary with nodes as keys and their corresponding PageRank values as values
+def csr_pagerank(G, damping=0.85, max_iter=10000, tol=0.005):
+    csr = compile_csr(G)
+    pr = pagerank_vector(csr, damping=damping, max_iter=max_iter, tol=tol)
+    return dict(zip(csr.names, pr.tolist()))
+
+
+#Maps a previous {page: score} dict onto the node order of csr
+#Pages that are new since the previous solve start at fill
+def warm_start_vector(csr, previous_scores, fill=0.0):
+    return np.array([previous_scores.get(name, fill) for name in csr.names], dtype=np.float64)
+
+
+# Residual-push refinement of an approximate PageRank vector
+# r = pagerank_step(x) - x is computed once; afterwards each round pushes the whole
+# frontier of nodes whose residual is above eps at once: their residual moves into x
+# and is spread over their out-links with one bincount. While the frontier is small
+# only its own edges are gathered, so a local change costs a few small rounds instead
+# of full sweeps. Mass pushed from dangling nodes is spread over every node. Each node
+# ends within about eps / (1 - damping) of the fixed point.
+# Returns the refined vector, the number of rounds and the final L1 residual.
+def push_refine(csr, x, damping=0.85, eps=1e-9, max_rounds=10000):
+    N = csr.num_nodes
+    E = len(csr.indices)
+    dangling = csr.out_degree == 0
+    inv_out = np.zeros(N)
+    inv_out[~dangling] = 1.0 / csr.out_degree[~dangling]
+    x = x.copy()
+    r = pagerank_step(csr, x, damping) - x
+
+    rounds = 0
+    while rounds < max_rounds:
+        frontier = np.flatnonzero(np.abs(r) > eps)
+        if len(frontier) == 0:
+            break
+        rounds += 1
+        pushed = r[frontier]
+        x[frontier] += pushed
+        r[frontier] = 0.0
+        r += damping * pushed[dangling[frontier]].sum() / N
+
+        counts = csr.out_degree[frontier]
+        num_edges = int(counts.sum())
+        if num_edges * 4 < E:
+            # Positions of the frontier's edges in csr.indices, one run per frontier node
+            edges = np.repeat(csr.indptr[frontier] - np.cumsum(counts) + counts, counts) + np.arange(num_edges)
+            r += np.bincount(csr.indices[edges], weights=np.repeat(damping * pushed * inv_out[frontier], counts), minlength=N)
+        else:
+            contrib = np.zeros(N)
+            contrib[frontier] = damping * pushed * inv_out[frontier]
+            r += np.bincount(csr.indices, weights=contrib[csr.sources], minlength=N)
+
+    x /= x.sum()
+    residual = float(np.abs(pagerank_step(csr, x, damping) - x).sum())
+    return x, rounds, residual
+
+
+# Re-ranks G after a small change, starting from the scores of the previous solve
+# method="push" refines only the nodes whose residual the change disturbed, a whole
+# frontier per round; method="power" runs ordinary power iteration from the previous vector.
+# Returns the {page: score} dict and a dict with the method, iterations and residual.
+def warm_start_pagerank(G, previous_scores, method="push", damping=0.85, max_iter=10000, tol=0.005, eps=1e-9):
+    csr = compile_csr(G)
+    if csr.num_nodes == 0:
+        return {}, {"method": method, "iterations": 0, "residual": 0.0}
+
+    start = warm_start_vector(csr, previous_scores, fill=1.0 / csr.num_nodes)
+    if method == "push":
+        pr, iterations, residual = push_refine(csr, start, damping=damping, eps=eps)
+    elif method == "power":
+        pr, iterations, residual = power_iteration(csr, start=start, damping=damping, max_iter=max_iter, tol=tol)
+    else:
+        raise ValueError(f"Unknown warm start method: {method}")
+
+    stats = {"method": method, "iterations": iterations, "residual": residual}
+    print(f"Warm-start PageRank ({method}): {iterations} iterations, residual {residual:.3g}")
+    return dict(zip(csr.names, pr.tolist())), stats
@@ -0,0 +1,72 @@
+import numpy as np
+from pagerank_engine import compile_csr, pagerank_step
+
+
+#Returns the indices of the k largest values of a score vector, highest first
+#argpartition selects them in O(N); only those k are sorted
+def top_k_indices(scores, k):
+    k = min(k, len(scores))
+    if k == 0:
+        return np.zeros(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind='stable')]
+
+
+#Returns the k highest-scoring (node, score) pairs of a {node: score} dict, highest first
+def top_k(scores, k):
+    names = list(scores.keys())
+    values = np.fromiter(scores.values(), dtype=np.float64, count=len(names))
+    return [(names[i], float(values[i])) for i in top_k_indices(values, k)]
+
+
+#Returns True when no score can move by more than `bound` without changing the ranking:
+#every gap between consecutive top-k scores, and between the k-th and the next best
+#score, is larger than 2 * bound. With require_order=False only the k-th gap is checked.
+def ranking_certified(scores, top, bound, require_order=True):
+    if len(top) == len(scores):
+        rest_best = -np.inf
+    else:
+        rest = np.ones(len(scores), dtype=bool)
+        rest[top] = False
+        rest_best = scores[rest].max()
+
+    ranked = scores[top]
+    if ranked[-1] - rest_best <= 2 * bound:
+        return False
+    return not require_order or bool(np.all(np.diff(ranked) < -2 * bound))
+
+
+# Power iteration that stops as soon as the top-k ranking is settled
+# The PageRank operator is a damping-contraction in L1, so after a sweep that moved the
+# vector by delta the distance to the true PageRank is at most damping/(1-damping)*delta.
+# Iteration stops once that bound certifies the top-k ranking (ranking_certified), well
+# before the whole vector converges. Returns the top-k (node, score) pairs and a dict
+# with the iterations run, the error bound and whether the ranking was certified.
+def topk_pagerank(G, k=100, damping=0.85, max_iter=10000, require_order=True):
+    csr = compile_csr(G)
+    N = csr.num_nodes
+    if N == 0:
+        return [], {"iterations": 0, "error_bound": 0.0, "certified": True}
+
+    pr = np.full(N, 1.0 / N)
+    bound = float("inf")
+    certified = False
+    iterations = 0
+    top = top_k_indices(pr, k)
+    for iterations in range(1, max_iter + 1):
+        new_pr = pagerank_step(csr, pr, damping)
+        new_pr /= new_pr.sum()
+        delta = float(np.abs(new_pr - pr).sum())
+        pr = new_pr
+
+        bound = damping / (1 - damping) * delta
+        top = top_k_indices(pr, k)
+        if ranking_certified(pr, top, bound, require_order):
+            certified = True
+            break
+        # Fully converged but tied scores can't be ordered with certainty
+        if delta < 1e-15:
+            break
+
+    stats = {"iterations": iterations, "error_bound": bound, "certified": certified}
+    return [(csr.names[i], float(pr[i])) for i in top], stats
@@ -0,0 +1,109 @@
+import os
+from datetime import datetime
+from urllib.parse import quote
+import aiohttp
+from yarl import URL
+from content_cache import FileMeta
+
+
+# Base URL of the GCS JSON API; STORAGE_EMULATOR_HOST redirects it, as it does for google-cloud-storage
+def storage_api_base():
+    return os.environ.get("STORAGE_EMULATOR_HOST", "https://storage.googleapis.com").rstrip("/")
+
+
+# Creates the HTTP session shared by every request; connections are pooled and kept alive
+# Must be called from the event loop that uses it
+def create_http_client(max_connections=1000, timeout=30.0):
+    return aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=max_connections),
+                                 timeout=aiohttp.ClientTimeout(total=timeout))
+
+
+def parse_meta(resource):
+    generation = int(resource["generation"])
+    updated = resource.get("updated")
+    return FileMeta(generation, resource.get("md5Hash") or str(generation),
+                    datetime.fromisoformat(updated.replace("Z", "+00:00")) if updated else None, int(resource["size"]))
+
+
+# Anonymous read access to one GCS bucket over the JSON API, without blocking the event loop
+# `listing` is a google-cloud-storage handle of the same bucket, which the MissingCache
+# shared with the WSGI server is keyed by
+class AsyncBucket:
+
+    def __init__(self, client, name, listing=None, api_base=None):
+        self.client = client
+        self.name = name
+        self.listing = listing
+        self.api_base = api_base or storage_api_base()
+
+    # Object names are sent with their slashes escaped, so the URL is marked as already encoded
+    def object_url(self, blob_path):
+        return URL("{}/storage/v1/b/{}/o/{}".format(self.api_base, quote(self.name, safe=""), quote(blob_path, safe="")), encoded=True)
+
+    # Returns the FileMeta of a blob, or None if it doesn't exist
+    async def get_meta(self, blob_path):
+        async with self.client.get(self.object_url(blob_path), params={"fields": "generation,md5Hash,updated,size"}) as response:
+            if response.status == 404:
+                return None
+            response.raise_for_status()
+            return parse_meta(await response.json())
+
+    async def download(self, blob_path, generation):
+        async with self.client.get(self.object_url(blob_path), params={"alt": "media", "generation": generation}) as response:
+            response.raise_for_status()
+            return await response.read()
+
+    # Yields bytes start..end-1 of one generation of a blob as they arrive from GCS
+    async def stream(self, blob_path, generation, start, end, chunk_size=256 * 1024):
+        if start >= end:
+            return
+        params = {"alt": "media", "generation": generation}
+        headers = {"Range": "bytes={}-{}".format(start, end - 1)}
+        async with self.client.get(self.object_url(blob_path), params=params, headers=headers) as response:
+            response.raise_for_status()
+            async for chunk in response.content.iter_chunked(chunk_size):
+                yield chunk
+
+
+# Async counterpart of content_cache.get_cached_content, sharing the same caches
+# Returns None if the blob doesn't exist, otherwise (data, meta); data is None for files
+# too large to cache, which the caller streams with bucket.stream, and on a miss whose
+# client_current(meta) is True, since a 304 doesn't need the body
+async def get_cached_content_async(cache, bucket, blob_path, missing=None, client_current=None):
+    if missing is not None and bucket.listing is not None and missing.is_missing(bucket.listing, blob_path):
+        return None
+    found = await fetch_content_async(cache, bucket, blob_path, client_current)
+    if found is None and missing is not None and bucket.listing is not None:
+        missing.record_miss(bucket.listing, blob_path)
+    return found
+
+
+async def fetch_content_async(cache, bucket, blob_path, client_current=None):
+    key = (bucket.name, blob_path)
+    cached = cache.lookup(key)
+    if cached is not None:
+        data, meta, fresh = cached
+        if fresh:
+            cache.count("hits")
+            return data, meta
+
+    meta = await bucket.get_meta(blob_path)
+    if meta is None:
+        if cached is not None:
+            cache.invalidate(key)
+        cache.count("misses")
+        return None
+    if cached is not None and cache.revalidate and meta.generation == cached[1].generation:
+        cache.touch(key)
+        cache.count("revalidations")
+        return cached[0], cached[1]
+
+    cache.count("misses")
+    if client_current is not None and client_current(meta):
+        return None, meta
+    if meta.size > cache.max_item_bytes:
+        cache.put(key, None, meta)
+        return None, meta
+    data = await bucket.download(blob_path, meta.generation)
+    cache.put(key, data, meta)
+    return data, meta
@@ -0,0 +1,191 @@
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from urllib.parse import quote
+import aiohttp
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+import uvicorn
+
+
+# Throughput benchmark: hw4_firstapp under waitress (threads=2) vs hw4_asyncapp under uvicorn
+# Both servers read from a local fake of the GCS JSON API (selected through
+# STORAGE_EMULATOR_HOST) that answers every call after `latency` seconds, standing in
+# for the round trip to GCS. Each concurrency level requests files neither server has
+# cached yet, so every request waits on storage. LOCAL_SINKS=1 keeps the servers' log
+# entries in memory and skips Pub/Sub, so no Google credentials are needed.
+#   python bench_servers.py -c 10,100,1000 -n 2000 --latency 0.05
+
+
+BENCH_BUCKET = "serena_ds561_hw2_bucket"
+BENCH_PREFIX = "Serena_Directory/ds561_hw2_pythonfiles/"
+GENERATION = 1
+
+
+def page(name):
+    return f"<!DOCTYPE html>\n<html>\n<body>\n<p>{name}</p>\n{'<p>filler</p>' * 50}\n</body>\n</html>\n".encode()
+
+
+# Fake GCS JSON API: num_files objects named BENCH_PREFIX + i.html in every bucket
+def fake_gcs_app(num_files, latency, base_url):
+    names = set(f"{BENCH_PREFIX}{i}.html" for i in range(num_files))
+
+    def resource(bucket, name):
+        data = page(name)
+        return {"kind": "storage#object", "bucket": bucket, "name": name, "generation": str(GENERATION),
+                "size": str(len(data)), "md5Hash": base64.b64encode(hashlib.md5(data).digest()).decode(), "updated": "2024-01-01T00:00:00.000Z",
+                "contentType": "text/html",
+                "mediaLink": f"{base_url}/download/storage/v1/b/{bucket}/o/{quote(name, safe='')}?generation={GENERATION}&alt=media"}
+
+    def media(name, request):
+        data = page(name)
+        byte_range = request.headers.get("range")
+        if byte_range:
+            start, end = byte_range.split("=")[1].split("-")
+            data = data[int(start):int(end) + 1]
+            return Response(data, status_code=206)
+        return Response(data)
+
+    async def list_objects(request):
+        await asyncio.sleep(latency)
+        bucket = request.path_params["bucket"]
+        prefix = request.query_params.get("prefix", "")
+        return JSONResponse({"kind": "storage#objects", "items": [resource(bucket, name) for name in sorted(names) if name.startswith(prefix)]})
+
+    async def get_object(request):
+        await asyncio.sleep(latency)
+        bucket, name = request.path_params["bucket"], request.path_params["name"]
+        if name not in names:
+            return JSONResponse({"error": {"code": 404, "message": "No such object"}}, status_code=404)
+        if request.query_params.get("alt") == "media":
+            return media(name, request)
+        return JSONResponse(resource(bucket, name))
+
+    return Starlette(routes=[
+        Route("/storage/v1/b/{bucket}/o", list_objects),
+        Route("/storage/v1/b/{bucket}/o/{name:path}", get_object),
+        Route("/download/storage/v1/b/{bucket}/o/{name:path}", get_object),
+    ])
+
+
+def start(command, env, cwd=None):
+    return subprocess.Popen(command, env=env, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+async def wait_ready(url, timeout=120):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(url) as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} not ready after {timeout}s")
+
+
+# Sends the given paths with `concurrency` requests in flight and returns throughput and latencies
+async def run_load(base_url, paths, concurrency):
+    latencies = []
+    statuses = {}
+    pending = iter(paths)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+
+    async with aiohttp.ClientSession(base_url, connector=connector, timeout=aiohttp.ClientTimeout(total=120)) as session:
+        async def worker():
+            for path in pending:
+                started = time.perf_counter()
+                try:
+                    async with session.get(path) as response:
+                        await response.read()
+                        status = response.status
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    status = "error"
+                latencies.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {"concurrency": concurrency, "requests": len(paths), "seconds": elapsed, "requests_per_sec": len(paths) / elapsed,
+            "p50_ms": 1000 * latencies[len(latencies) // 2], "p99_ms": 1000 * latencies[int(0.99 * (len(latencies) - 1))],
+            "statuses": {str(status): count for status, count in statuses.items()}}
+
+
+async def benchmark(args):
+    levels = [int(level) for level in args.concurrency.split(",")]
+    # The warm-up prefetches the first WARMUP_FIRST_N names in listing (lexicographic) order,
+    # so every level requests its own slice of the names after those
+    first = 1000
+    num_files = first + len(levels) * args.requests
+    unseen = sorted(f"{BENCH_PREFIX}{i}.html" for i in range(num_files))[first:]
+    gcs_url = f"http://127.0.0.1:{args.gcs_port}"
+    env = dict(os.environ, STORAGE_EMULATOR_HOST=gcs_url, LOCAL_SINKS="1")
+    here = os.path.dirname(os.path.abspath(__file__))
+
+    servers = {
+        "waitress": [sys.executable, "-m", "waitress", "--host=127.0.0.1", f"--port={args.port}", f"--threads={args.threads}", "hw4_firstapp:app"],
+        "asyncio": [sys.executable, "-m", "uvicorn", "hw4_asyncapp:app", "--host", "127.0.0.1", "--port", str(args.port), "--log-level", "warning"],
+    }
+    fake_gcs = start([sys.executable, os.path.abspath(__file__), "--serve_fake_gcs", "--gcs_port", str(args.gcs_port),
+                      "--latency", str(args.latency), "--num_files", str(num_files)], env)
+    results = []
+    try:
+        await wait_ready(f"{gcs_url}/storage/v1/b/{BENCH_BUCKET}/o/{quote(BENCH_PREFIX + '0.html', safe='')}")
+        for name, command in servers.items():
+            server = start(command, env, cwd=here)
+            try:
+                base_url = f"http://127.0.0.1:{args.port}"
+                await wait_ready(f"{base_url}/ready")
+                for level, concurrency in enumerate(levels):
+                    paths = [f"/{BENCH_BUCKET}/{name}" for name in unseen[level * args.requests:(level + 1) * args.requests]]
+                    result = await run_load(base_url, paths, concurrency)
+                    result["server"] = name
+                    results.append(result)
+                    print(f"{name:8} c={concurrency:<5} {result['requests_per_sec']:8.0f} req/s  p50 {result['p50_ms']:7.1f} ms  "
+                          f"p99 {result['p99_ms']:7.1f} ms  {result['statuses']}")
+            finally:
+                server.terminate()
+                server.wait()
+    finally:
+        fake_gcs.terminate()
+        fake_gcs.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the waitress and asyncio file servers against a fake GCS with fixed latency")
+    parser.add_argument("-c", "--concurrency", default="10,100,1000", help="Comma-separated numbers of requests in flight")
+    parser.add_argument("-n", "--requests", type=int, default=2000, help="Requests per concurrency level")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds the fake GCS takes per call")
+    parser.add_argument("--threads", type=int, default=2, help="waitress threads, as in hw4_firstapp")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--gcs_port", type=int, default=9023)
+    parser.add_argument("--num_files", type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument("--serve_fake_gcs", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("-o", "--output", default="bench_servers.json")
+    args = parser.parse_args()
+
+    if args.serve_fake_gcs:
+        base_url = f"http://127.0.0.1:{args.gcs_port}"
+        uvicorn.run(fake_gcs_app(args.num_files, args.latency, base_url), host="127.0.0.1", port=args.gcs_port, log_level="warning")
+        return
+
+    results = asyncio.run(benchmark(args))
+    with open(args.output, "w") as f:
+        json.dump({"latency": args.latency, "waitress_threads": args.threads, "results": results}, f, indent=2)
+    print(f"Wrote {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+from contextlib import asynccontextmanager
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from werkzeug.http import http_date, parse_date, parse_etags, parse_range_header
+import uvicorn
+from async_storage import AsyncBucket, create_http_client, get_cached_content_async
+from file_streaming import not_modified
+# Same logger, publisher, caches, banned list and warm-up as the WSGI server
+from hw4_firstapp import (Banned_Countries, content_cache, forbidden_events, initialize_storage_client, logger,
+                          missing_cache, publisher, warmed_up)
+
+
+# asyncio variant of hw4_firstapp, served by uvicorn
+# Routes and status codes are the same as serve_file's, but GCS is read over async HTTP
+# (async_storage.py), so a request waiting on storage doesn't hold a thread and one
+# process can keep thousands of requests in flight. Logging and Pub/Sub only enqueue,
+# so they don't block the event loop either.
+#   uvicorn hw4_asyncapp:app --host 0.0.0.0 --port 80
+# bench_servers.py compares it with the waitress mode of hw4_firstapp.
+
+
+http_client = None
+async_buckets = {}
+
+
+@asynccontextmanager
+async def lifespan(app):
+    global http_client
+    http_client = create_http_client()
+    yield
+    await http_client.close()
+
+
+# Returns the shared async handle for a GCS bucket, creating it on first use
+def get_async_bucket(bucket_name):
+    bucket = async_buckets.get(bucket_name)
+    if bucket is None:
+        bucket = async_buckets[bucket_name] = AsyncBucket(http_client, bucket_name, listing=initialize_storage_client(bucket_name))
+    return bucket
+
+
+def validator_headers(meta):
+    headers = {"ETag": '"{}"'.format(meta.etag)}
+    if meta.last_modified is not None:
+        headers["Last-Modified"] = http_date(meta.last_modified)
+    return headers
+
+
+# Starlette counterpart of file_streaming.file_response, with the same 304/206/416 rules
+def file_response(found, bucket, blob_path, request):
+    data, meta = found
+    if not_modified(meta, parse_etags(request.headers.get("if-none-match")), parse_date(request.headers.get("if-modified-since"))):
+        return Response(status_code=304, headers=validator_headers(meta))
+
+    size = len(data) if data is not None else meta.size
+    start, end, status = 0, size, 200
+    byte_range = parse_range_header(request.headers.get("range"))
+    if byte_range is not None and byte_range.units == "bytes" and len(byte_range.ranges) == 1:
+        bounds = byte_range.range_for_length(size)
+        if bounds is None:
+            return Response("Requested Range Not Satisfiable", media_type="text/html", status_code=416,
+                            headers={"Content-Range": "bytes */{}".format(size)})
+        start, end = bounds
+        status = 206
+
+    headers = validator_headers(meta)
+    headers["Content-Length"] = str(end - start)
+    headers["Accept-Ranges"] = "bytes"
+    if status == 206:
+        headers["Content-Range"] = "bytes {}-{}/{}".format(start, end - 1, size)
+
+    if request.method == "HEAD":
+        return Response(status_code=status, media_type="text/html", headers=headers)
+    if data is not None:
+        return Response(data[start:end], status_code=status, media_type="text/html", headers=headers)
+    return StreamingResponse(bucket.stream(blob_path, meta.generation, start, end), status_code=status,
+                             media_type="text/html", headers=headers)
+
+
+# Builds the response for a file in the bucket, or returns None if it doesn't exist
+async def get_file_response(filename, subdirectory, bucket, request):
+    try:
+        blob_path = f"{subdirectory}/{filename}"
+        if_none_match = parse_etags(request.headers.get("if-none-match"))
+        if_modified_since = parse_date(request.headers.get("if-modified-since"))
+        found = await get_cached_content_async(content_cache, bucket, blob_path, missing=missing_cache,
+                                               client_current=lambda meta: not_modified(meta, if_none_match, if_modified_since))
+        if found is not None:
+            return file_response(found, bucket, blob_path, request)
+    except Exception as e:
+        print(f"Error occurred: {e}")
+
+
+async def ready(request):
+    if warmed_up.is_set():
+        return Response("READY", media_type="text/html", status_code=200)
+    return Response("WARMING UP", media_type="text/html", status_code=503)
+
+
+async def cache_stats(request):
+    return JSONResponse(dict(content_cache.stats(), **missing_cache.stats()))
+
+
+async def log_stats(request):
+    return JSONResponse(logger.stats())
+
+
+async def publish_stats(request):
+    return JSONResponse(dict(publisher.stats(), **forbidden_events.stats()))
+
+
+async def serve_file(request):
+    params = request.path_params
+    filename = params["file_name"]
+    directory = params["dir_name"] + "/" + params["dir2_name"]
+    bucket = get_async_bucket(params["bucket"])
+
+    # Extract the country directly from the header
+    country = request.headers.get('X-country', '').lower().strip()
+
+    # If the request method is not GET or HEAD, log and return 501 status
+    if request.method not in ('GET', 'HEAD'):
+        logger.log_text("Received unexpected method {}. Responding with 501.".format(request.method), severity='ERROR')
+        return Response("Not implemented", media_type="text/html", status_code=501)
+
+    # If the country is banned, count the event and return a 400 status
+    if country in Banned_Countries:
+        logger.log_text('Forbidden Country: {}'.format(country), severity='ERROR')
+        forbidden_events.record(country, request.headers.get('X-client-IP', '').split(',')[0].strip())
+        return Response("FORBIDDEN COUNTRY", media_type="text/html", status_code=400)
+
+    # Check if file exists and return it, else log error and return 404
+    response = await get_file_response(filename, directory, bucket, request)
+
+    if response is not None:
+        logger.log_text("Served file {} successfully with {}.".format(filename, response.status_code), severity='INFO')
+        return response
+    logger.log_text("File {} not found. Responding with 404.".format(filename), severity='ERROR')
+    return Response("File Not Found", media_type="text/html", status_code=404)
+
+
+app = Starlette(lifespan=lifespan, routes=[
+    Route('/ready', ready),
+    Route('/cache_stats', cache_stats),
+    Route('/log_stats', log_stats),
+    Route('/publish_stats', publish_stats),
+    Route('/{bucket}/{dir_name}/{dir2_name}/{file_name}', serve_file,
+          methods=['GET', 'PUT', 'POST', 'DELETE', 'HEAD', 'CONNECT', 'OPTIONS', 'TRACE', 'PATCH']),
+])
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host='0.0.0.0', port=80)
@@ -1,23 +1,39 @@
-from flask import Flask, request, Response
+import os
+from flask import Flask, request, Response, jsonify
 from google.cloud import storage
-from google.cloud import pubsub_v1
 from google.cloud.logging import Client as LoggingClient
-import traceback
+from async_logger import AsyncLogger, CloudLoggingSink, MemorySink
+from event_publisher import EventPublisher, ForbiddenEventAggregator, NullPublisher
+import threading
+from requests.adapters import HTTPAdapter
+from content_cache import ContentCache, MissingCache, get_cached_content, warm_up
+from file_streaming import file_response, not_modified
 from waitress import serve
 
 
-# Initialize the Google Cloud Pub/Sub publisher client
-publisher = pubsub_v1.PublisherClient()
+# Pub/Sub topic for forbidden-request events
 project_id = "ds-561-first-project"
 topic_id = "serena_topic"
-topic_path = publisher.topic_path(project_id, topic_id)
 
 
 
 
+# With LOCAL_SINKS=1, log entries are kept in memory and events aren't published, so the
+# server runs without Cloud Logging or Pub/Sub credentials (bench_servers.py sets it)
+local_sinks = os.environ.get("LOCAL_SINKS") == "1"
+
 # Initialize the Google Cloud Logging client
-client = LoggingClient()
-logger = client.logger('homework4_logger')
+# Log calls only enqueue; a background thread writes the entries to Cloud Logging in batches
+if local_sinks:
+    logger = AsyncLogger(MemorySink())
+else:
+    client = LoggingClient()
+    logger = AsyncLogger(CloudLoggingSink(client.logger('homework4_logger')))
+
+# Forbidden-request events are batched and published in the background
+publisher = NullPublisher() if local_sinks else EventPublisher(project_id, topic_id, logger=logger)
+# Forbidden requests are counted per country and published once every 10 seconds
+forbidden_events = ForbiddenEventAggregator(publisher, window=10)
 
 
 Banned_Countries = ["north korea", "iran", "cuba", "myanmar", "iraq", "libya", "sudan", "zimbabwe", "syria"]
@@ -25,31 +41,103 @@ Banned_Countries = ["north korea", "iran", "cuba", "myanmar", "iraq", "libya", "
 
 app = Flask(__name__)
 
-# Initialize connection to GCS bucket
-def initialize_storage_client(bucket_name):
+# Creates the GCS client shared by every request thread
+# Its requests session keeps connections alive; the pool is sized for concurrent requests
+def create_storage_client(pool_size=32):
     client = storage.Client.create_anonymous_client()
-    return client.bucket(bucket_name)
+    client._http.mount("https://", HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+    return client
+
+
+storage_client = create_storage_client()
+bucket_handles = {}
+bucket_lock = threading.Lock()
+
+
+# Returns the shared handle for a GCS bucket, creating it on first use
+def initialize_storage_client(bucket_name):
+    bucket = bucket_handles.get(bucket_name)
+    if bucket is None:
+        with bucket_lock:
+            bucket = bucket_handles.setdefault(bucket_name, storage_client.bucket(bucket_name))
+    return bucket
+
 
 
+# In-memory cache of recently served files, shared by all request threads
+content_cache = ContentCache(max_bytes=64 * 1024 * 1024, ttl=60, revalidate=True)
+# Names known not to exist, from recent 404s and a periodic bucket listing
+missing_cache = MissingCache(ttl=30, refresh_interval=60)
 
-# Extract file content from the bucket
-def get_file_content(filename, subdirectory, bucket):
+
+# Builds the response for a file in the bucket, or returns None if it doesn't exist
+# Small files come from the content cache; larger ones are streamed from GCS in chunks
+# Conditional requests are answered with 304 from the cached metadata
+def get_file_response(filename, subdirectory, bucket):
     try:
         print(f"Received filename: {filename}")
         blob_path = f"{subdirectory}/{filename}"
         print(f"Constructed blob path: {blob_path}")
 
-        blob = bucket.get_blob(blob_path)
-
-        if blob:
-            return blob.download_as_text()
-        else:
-            return None
+        # A conditional request for a file that isn't cached is answered from the metadata alone
+        found = get_cached_content(content_cache, bucket, blob_path, missing=missing_cache,
+                                   client_current=lambda meta: not_modified(meta, request.if_none_match, request.if_modified_since))
+        if found is not None:
+            return file_response(found, request.range, request.if_none_match, request.if_modified_since)
     except Exception as e:
         print(f"Error occurred: {e}")
 
     
 
+# Bucket/prefix listed at startup, and how many of its files to prefetch into the cache,
+# taken from the start of the listing in name order
+WARMUP_BUCKET = "serena_ds561_hw2_bucket"
+WARMUP_PREFIX = "Serena_Directory/ds561_hw2_pythonfiles/"
+WARMUP_FIRST_N = 1000
+warmed_up = threading.Event()
+
+
+# Builds the object manifest and fills the content cache before the server reports ready
+# A failed warm-up is logged and the server still becomes ready, just cold
+def run_warm_up():
+    try:
+        listed, prefetched = warm_up(content_cache, missing_cache, initialize_storage_client(WARMUP_BUCKET), WARMUP_PREFIX, first_n=WARMUP_FIRST_N)
+        logger.log_text("Warm-up listed {} files and prefetched {}.".format(listed, prefetched), severity='INFO')
+    except Exception as e:
+        logger.log_text("Warm-up failed: {}".format(e), severity='ERROR')
+    finally:
+        warmed_up.set()
+
+
+threading.Thread(target=run_warm_up, daemon=True).start()
+
+
+# Readiness check for the load balancer: 503 until the warm-up has finished
+@app.route('/ready')
+def ready():
+    if warmed_up.is_set():
+        return "READY", 200
+    return Response("WARMING UP", content_type="text/html", status=503)
+
+
+# Hit/miss/eviction counters of the content cache and the missing-file cache
+@app.route('/cache_stats')
+def cache_stats():
+    return jsonify(dict(content_cache.stats(), **missing_cache.stats()))
+
+
+# Queue and batch counters of the background log writer
+@app.route('/log_stats')
+def log_stats():
+    return jsonify(logger.stats())
+
+
+# Counters of the forbidden-event publisher and aggregator
+@app.route('/publish_stats')
+def publish_stats():
+    return jsonify(dict(publisher.stats(), **forbidden_events.stats()))
+
+
 @app.route('/<bucket>/<dir_name>/<dir2_name>/<file_name>', methods=['GET', 'PUT', 'POST', 'DELETE', 'HEAD', 'CONNECT', 'OPTIONS', 'TRACE', 'PATCH'])
 def serve_file(bucket,dir_name, dir2_name, file_name):
     
@@ -65,31 +153,24 @@ def serve_file(bucket,dir_name, dir2_name, file_name):
     country = request.headers.get('X-country', '').lower().strip()
     print("file name:", filename)
     
-    # If the request method is not GET, log and return 501 status
-    if request.method != 'GET':
+    # If the request method is not GET or HEAD, log and return 501 status
+    if request.method not in ('GET', 'HEAD'):
         logger.log_text("Received unexpected method {}. Responding with 501.".format(request.method), severity='ERROR')
         return Response("Not implemented", content_type="text/html", status=501)
 
     # If the country is banned, publish a message and return a 400 status
     if country in Banned_Countries:
         logger.log_text('Forbidden Country: {}'.format(country), severity='ERROR')
-        message = "Forbidden request from {}".format(country)
-        try:
-            publish_future = publisher.publish(topic_path, message.encode("utf-8"))
-            publish_future.result()
-            logger.log_text("Message publishing initiated", severity='INFO') 
-            logger.log_text("Message with ID {} published successfully.".format(publish_future.result()), severity='INFO')
-        except Exception as e:
-            logger.log_text("Error publishing message: {}".format(e), severity='ERROR')
-            logger.log_text(traceback.format_exc(), severity='ERROR')
+        # Counted here; one message per country is published at the end of the window
+        forbidden_events.record(country, request.headers.get('X-client-IP', '').split(',')[0].strip())
         return "FORBIDDEN COUNTRY", 400
     
     # Check if file exists and return it, else log error and return 404
-    content = get_file_content(filename, directory, bucket)
+    response = get_file_response(filename, directory, bucket)
 
-    if content:
-        logger.log_text("Served file {} successfully with 200 OK.".format(filename), severity='INFO')
-        return content
+    if response is not None:
+        logger.log_text("Served file {} successfully with {}.".format(filename, response.status), severity='INFO')
+        return response
     else:
         logger.log_text("File {} not found. Responding with 404.".format(filename), severity='ERROR')
         return Response("File Not Found", content_type="text/html", status=404)
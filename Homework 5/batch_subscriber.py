@@ -0,0 +1,152 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from google.cloud import pubsub_v1
+from google.cloud.pubsub_v1.subscriber.scheduler import ThreadScheduler
+
+
+# The fields of a Pub/Sub message kept by the sinks
+def message_record(message):
+    return {"message_id": message.message_id, "publish_time": message.publish_time.isoformat(),
+            "data": message.data.decode("utf-8", "replace"), "attributes": dict(message.attributes)}
+
+
+# Appends records to a file as JSON lines; a batch is durable once fsync returns
+class FileSink:
+
+    def __init__(self, path):
+        self.file = open(path, "a", encoding="utf-8")
+
+    def write(self, records):
+        self.file.write("".join(json.dumps(record) + "\n" for record in records))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+
+# Inserts records into a SQLite table, one committed transaction per batch
+# Pub/Sub delivers at least once, so a redelivered message_id is ignored
+class SQLiteSink:
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=FULL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS events (message_id TEXT PRIMARY KEY, publish_time TEXT, data TEXT, attributes TEXT)")
+        self.conn.commit()
+
+    def write(self, records):
+        with self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO events VALUES (?, ?, ?, ?)",
+                                  [(r["message_id"], r["publish_time"], r["data"], json.dumps(r["attributes"])) for r in records])
+
+    def close(self):
+        self.conn.close()
+
+
+# Subscriber callback that writes messages to a sink in batches and acks them afterwards
+# callback() runs on the scheduler's threads and only queues the message. One writer
+# thread takes up to batch_size messages, or whatever arrived within max_delay seconds,
+# writes them to the sink and only then acks them; if the write fails they are nacked
+# and Pub/Sub redelivers them. Every report_every seconds the messages/sec and the ack
+# latency (receipt to ack) over that interval are printed.
+class BatchingSubscriber:
+
+    def __init__(self, sink, batch_size=500, max_delay=1.0, report_every=10.0):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.report_every = report_every
+        # Unbounded, since the subscriber's flow control already caps unacked messages
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.acked = 0
+        self.nacked = 0
+        self.batches = 0
+        self.latencies = []
+        self.last_report = (time.monotonic(), 0)
+        self.writer = threading.Thread(target=self.run, daemon=True)
+        self.writer.start()
+        self.reporter = threading.Thread(target=self.report_loop, daemon=True)
+        self.reporter.start()
+
+    def callback(self, message):
+        self.queue.put((message, time.monotonic()))
+
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self.write(batch)
+
+    def write(self, batch):
+        try:
+            self.sink.write([message_record(message) for message, _ in batch])
+        except Exception as e:
+            print(f"Error writing {len(batch)} messages, nacking them: {e}")
+            for message, _ in batch:
+                message.nack()
+            with self.lock:
+                self.nacked += len(batch)
+            return
+        for message, _ in batch:
+            message.ack()
+        now = time.monotonic()
+        with self.lock:
+            self.acked += len(batch)
+            self.batches += 1
+            self.latencies.extend(now - received for _, received in batch)
+
+    # Returns {acked, nacked, batches} totals plus messages/sec and ack latency since the last call
+    def stats(self):
+        with self.lock:
+            latencies, self.latencies = self.latencies, []
+            totals = {"acked": self.acked, "nacked": self.nacked, "batches": self.batches}
+        now = time.monotonic()
+        last_time, last_acked = self.last_report
+        self.last_report = (now, totals["acked"])
+        elapsed = now - last_time
+        totals["messages_per_sec"] = (totals["acked"] - last_acked) / elapsed if elapsed > 0 else 0.0
+        latencies.sort()
+        totals["ack_latency_mean_ms"] = 1000 * sum(latencies) / len(latencies) if latencies else 0.0
+        totals["ack_latency_p99_ms"] = 1000 * latencies[int(0.99 * (len(latencies) - 1))] if latencies else 0.0
+        return totals
+
+    def report_loop(self):
+        while True:
+            time.sleep(self.report_every)
+            stats = self.stats()
+            print(f"{stats['messages_per_sec']:.0f} msgs/sec, ack latency mean {stats['ack_latency_mean_ms']:.1f} ms "
+                  f"p99 {stats['ack_latency_p99_ms']:.1f} ms, {stats['acked']} acked, {stats['nacked']} nacked")
+
+
+# Starts a streaming pull that feeds `handler`, with flow control and a sized thread pool
+# At most max_messages / max_bytes are leased but unacked at once; callbacks run on
+# `workers` threads. Returns the streaming pull future. PUBSUB_EMULATOR_HOST is honoured.
+def subscribe_batched(subscriber, subscription_path, handler, max_messages=1000, max_bytes=100 * 1024 * 1024, workers=8):
+    flow_control = pubsub_v1.types.FlowControl(max_messages=max_messages, max_bytes=max_bytes)
+    scheduler = ThreadScheduler(executor=ThreadPoolExecutor(max_workers=workers))
+    return subscriber.subscribe(subscription_path, callback=handler.callback, flow_control=flow_control, scheduler=scheduler)
+
+
+# Builds the sink named on the command line
+def create_sink(kind, path):
+    if kind == "sqlite":
+        return SQLiteSink(path)
+    if kind == "file":
+        return FileSink(path)
+    raise ValueError(f"Unknown sink {kind!r}, expected 'file' or 'sqlite'")
@@ -0,0 +1,72 @@
+from flask import Response
+
+
+# Yields bytes start..end-1 of a GCS blob in chunk_size reads
+# The blob is opened on the first next() call, so a HEAD response (whose body is never
+# iterated) doesn't open a download at all
+def stream_blob(blob, start, end, chunk_size):
+    with blob.open("rb", chunk_size=chunk_size) as f:
+        if start:
+            f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+# Returns True when the client's cached copy is still current
+# If-None-Match takes precedence; If-Modified-Since is compared at the one-second
+# resolution of HTTP dates
+def not_modified(meta, if_none_match=None, if_modified_since=None):
+    if if_none_match:
+        return if_none_match.contains_weak(meta.etag)
+    if if_modified_since is not None and meta.last_modified is not None:
+        return meta.last_modified.replace(microsecond=0) <= if_modified_since
+    return False
+
+
+# Sets the validators a client needs to make its next request conditional
+def set_validators(response, meta):
+    response.headers['ETag'] = '"{}"'.format(meta.etag)
+    if meta.last_modified is not None:
+        response.last_modified = meta.last_modified
+    return response
+
+
+# Builds the response for a file found by get_cached_content: (data, meta, blob)
+# A client whose copy is current gets an empty 304 without the body being read. Otherwise
+# cached files are sent from memory and files too large to cache (data is None) are
+# streamed from the blob in chunks instead of being read into memory first.
+# Content-Length, ETag and Last-Modified are always set. A single bytes range gets a 206
+# with only that slice, an unsatisfiable one a 416; multiple ranges get the whole file.
+def file_response(found, byte_range=None, if_none_match=None, if_modified_since=None, chunk_size=256 * 1024):
+    data, meta, blob = found
+    if not_modified(meta, if_none_match, if_modified_since):
+        return set_validators(Response(status=304), meta)
+
+    size = len(data) if data is not None else meta.size
+    start, end, status = 0, size, 200
+
+    if byte_range is not None and byte_range.units == "bytes" and len(byte_range.ranges) == 1:
+        bounds = byte_range.range_for_length(size)
+        if bounds is None:
+            response = Response("Requested Range Not Satisfiable", content_type="text/html", status=416)
+            response.headers['Content-Range'] = "bytes */{}".format(size)
+            return response
+        start, end = bounds
+        status = 206
+
+    if data is not None:
+        body = data[start:end]
+    else:
+        body = stream_blob(blob, start, end, chunk_size)
+
+    response = Response(body, content_type="text/html", status=status)
+    response.headers['Content-Length'] = str(end - start)
+    response.headers['Accept-Ranges'] = "bytes"
+    if status == 206:
+        response.headers['Content-Range'] = "bytes {}-{}/{}".format(start, end - 1, size)
+    return set_validators(response, meta)
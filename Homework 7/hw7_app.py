@@ -1,7 +1,8 @@
+import os
 import apache_beam as beam
 from apache_beam.options.pipeline_options import PipelineOptions
 from apache_beam.io.fileio import MatchFiles, ReadMatches
-from bs4 import BeautifulSoup
+from link_extractor import extract_links
 from apache_beam.transforms.combiners import Top
 from apache_beam.metrics import Metrics, MetricsFilter
 
@@ -16,26 +17,22 @@ class ExtractLinksFn(beam.DoFn):
 
     def process(self, element):
         file_name, file_contents = element
-        soup = BeautifulSoup(file_contents, 'html.parser')
         
         # Unique set for each document to avoid double-counting the same link in one document
         unique_links = set()
 
-        for a_tag in soup.find_all('a', href=True):
-            link = a_tag['href'].strip()
-            if not link.startswith('http'):
-                normalized_link = link.lstrip('/')
-
-                # Only count unique links for outgoing links per document
-                if normalized_link not in unique_links:
-                    self.outgoing_links_counter.inc()
-                    yield file_name, (normalized_link, 1)
-                    unique_links.add(normalized_link)
-                
-                # For incoming links, count every link because each represents
-                # a different source document pointing to the target
-                self.incoming_links_counter.inc()
-                yield normalized_link, (file_name, 1)
+        # Scan the raw bytes for relative hrefs; targets keep their ".html" suffix to match file names
+        for normalized_link in extract_links(file_contents, keep_suffix=True, skip_absolute=True):
+            # Only count unique links for outgoing links per document
+            if normalized_link not in unique_links:
+                self.outgoing_links_counter.inc()
+                yield file_name, (normalized_link, 1)
+                unique_links.add(normalized_link)
+            
+            # For incoming links, count every link because each represents
+            # a different source document pointing to the target
+            self.incoming_links_counter.inc()
+            yield normalized_link, (file_name, 1)
         
 
 def invert_links(element):
@@ -59,7 +56,9 @@ def main():
     options = PipelineOptions(
         runner='DirectRunner',  #change to DataFlowRunner to run on GCP
         project= 'ds-561-first-project',
-        job_name='html-link-counter'
+        job_name='html-link-counter',
+        # Ships link_extractor.py to the Dataflow workers
+        setup_file=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'setup.py')
     )
 
     input_files_path = 'gs://serena_ds561_hw2_bucket/Serena_Directory/ds561_hw2_pythonfiles/*'
@@ -72,7 +71,7 @@ def main():
         files = (p
                  | 'MatchFiles' >> MatchFiles(input_files_path)
                  | 'ReadMatches' >> ReadMatches()
-                 | 'MapToFileNameAndContent' >> beam.Map(lambda file: (file.metadata.path.split('/')[-1], file.read_utf8()))
+                 | 'MapToFileNameAndContent' >> beam.Map(lambda file: (file.metadata.path.split('/')[-1], file.read()))
                  )
 
         links = (files | 'ExtractLinks' >> beam.ParDo(ExtractLinksFn()))
@@ -0,0 +1,10 @@
+import setuptools
+
+
+# Packages the local modules hw7_app.py imports, so Dataflow workers install them
+# (passed to the pipeline as --setup_file; DirectRunner imports them from this directory)
+setuptools.setup(
+    name='hw7-link-counter',
+    version='0.1.0',
+    py_modules=['link_extractor'],
+)
@@ -0,0 +1,245 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+
+# What a response needs to know about a blob without downloading it: the generation the
+# cache revalidates against, the ETag (md5 when GCS has one), Last-Modified and size
+FileMeta = namedtuple("FileMeta", ["generation", "etag", "last_modified", "size"])
+
+
+def blob_meta(blob):
+    return FileMeta(blob.generation, blob.md5_hash or str(blob.generation), blob.updated, blob.size)
+
+
+# In-memory LRU cache for file contents served from GCS, shared by all request threads
+# Entries are bounded by total bytes rather than count. After `ttl` seconds an entry is
+# stale: with revalidate on, one metadata call checks the blob generation and a match
+# keeps the cached bytes; with it off, stale entries are simply downloaded again.
+# Files above max_item_bytes keep a metadata-only entry (data None), so conditional
+# requests for them can still be answered without GCS.
+class ContentCache:
+
+    # Charged per entry on top of its data, so metadata-only entries are bounded too
+    ENTRY_OVERHEAD = 256
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttl=60, revalidate=True, max_item_bytes=None):
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes or max_bytes // 8
+        self.ttl = ttl
+        self.revalidate = revalidate
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.revalidations = 0
+
+    def entry_size(self, data):
+        return self.ENTRY_OVERHEAD + (len(data) if data is not None else 0)
+
+    # Returns (data, meta, fresh) for a cached key, or None
+    def lookup(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+            data, meta, expires = entry
+            return data, meta, time.monotonic() < expires
+
+    # Stores data and metadata for a key, evicting least recently used entries to stay under
+    # max_bytes. Data over max_item_bytes is dropped and only the metadata kept.
+    def put(self, key, data, meta):
+        if data is not None and len(data) > self.max_item_bytes:
+            data = None
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= self.entry_size(old[0])
+            self.entries[key] = (data, meta, time.monotonic() + self.ttl)
+            self.size += self.entry_size(data)
+            while self.size > self.max_bytes:
+                _, (evicted, _, _) = self.entries.popitem(last=False)
+                self.size -= self.entry_size(evicted)
+                self.evictions += 1
+
+    # Marks a stale entry fresh again after its generation was confirmed
+    def touch(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries[key] = (entry[0], entry[1], time.monotonic() + self.ttl)
+
+    def invalidate(self, key):
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is not None:
+                self.size -= self.entry_size(entry[0])
+
+    def count(self, counter):
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self):
+        with self.lock:
+            return {"entries": len(self.entries), "bytes": self.size, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "revalidations": self.revalidations}
+
+
+# Remembers which files don't exist, so repeated 404s don't reach GCS
+# Two sources: a short-TTL set of names that just returned 404, and a listing of every
+# watched bucket/prefix that a background thread refreshes every refresh_interval
+# seconds. Once a prefix has been listed, any name outside the listing is known
+# missing; newly uploaded files become visible at the next refresh. Only prefixes the
+# server was configured with are watched (see warm_up); other paths from requests
+# just use the miss set, so clients can't make the server list arbitrary buckets.
+class MissingCache:
+
+    def __init__(self, ttl=30, refresh_interval=60, max_entries=100000):
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+        self.max_entries = max_entries
+        self.misses = OrderedDict()
+        self.listings = {}
+        self.watched = set()
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self.thread = None
+        self.negative_hits = 0
+
+    # Returns True if bucket/blob_path is known not to exist
+    def is_missing(self, bucket, blob_path):
+        prefix = blob_path.rsplit("/", 1)[0] + "/"
+        with self.lock:
+            expires = self.misses.get((bucket.name, blob_path))
+            if expires is not None and time.monotonic() < expires:
+                missing = True
+            else:
+                listing = self.listings.get((bucket.name, prefix))
+                missing = listing is not None and blob_path not in listing
+            if missing:
+                self.negative_hits += 1
+        return missing
+
+    # Remembers a 404 for ttl seconds
+    def record_miss(self, bucket, blob_path):
+        with self.lock:
+            self.misses[(bucket.name, blob_path)] = time.monotonic() + self.ttl
+            self.misses.move_to_end((bucket.name, blob_path))
+            while len(self.misses) > self.max_entries:
+                self.misses.popitem(last=False)
+
+    # Adds a configured bucket/prefix to the background listing and starts the refresher
+    # if needed. The first refresh comes refresh_interval seconds later, so the caller
+    # installs the initial listing with set_listing.
+    def watch(self, bucket, prefix):
+        with self.lock:
+            self.watched.add((bucket.name, prefix))
+            self.buckets[bucket.name] = bucket
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.refresh_loop, daemon=True)
+                self.thread.start()
+
+    # Lists one bucket/prefix and swaps in the new set of names
+    def refresh(self, bucket_name, prefix):
+        names = set(blob.name for blob in self.buckets[bucket_name].list_blobs(prefix=prefix))
+        self.set_listing(bucket_name, prefix, names)
+
+    def set_listing(self, bucket_name, prefix, names):
+        with self.lock:
+            self.listings[(bucket_name, prefix)] = names
+
+    def refresh_loop(self):
+        while True:
+            time.sleep(self.refresh_interval)
+            with self.lock:
+                watched = list(self.watched)
+            for bucket_name, prefix in watched:
+                try:
+                    self.refresh(bucket_name, prefix)
+                except Exception as e:
+                    print(f"Error listing {bucket_name}/{prefix}: {e}")
+
+    def stats(self):
+        with self.lock:
+            return {"negative_hits": self.negative_hits, "recent_misses": len(self.misses),
+                    "listed_names": sum(len(names) for names in self.listings.values())}
+
+
+# Looks up bucket/blob_path and returns None if it doesn't exist, otherwise
+# (data, meta, blob). data holds the bytes of files small enough to cache; for larger
+# files it is None and the caller streams `blob` instead. blob is None on a fresh cache
+# hit for a small file. With a MissingCache, names known not to exist cost no GCS call.
+# client_current(meta) returns True when the client's copy is current (a conditional
+# request that will get a 304); on a cache miss the body is then not downloaded and
+# data is None.
+def get_cached_content(cache, bucket, blob_path, missing=None, client_current=None):
+    if missing is not None and missing.is_missing(bucket, blob_path):
+        return None
+    found = fetch_content(cache, bucket, blob_path, client_current)
+    if found is None and missing is not None:
+        missing.record_miss(bucket, blob_path)
+    return found
+
+
+# Fresh cache hits cost no GCS calls, revalidated hits one metadata call, misses the usual two
+# Large files cost one metadata call on a miss and none on a fresh hit; their body is
+# only read if the caller streams the returned blob
+def fetch_content(cache, bucket, blob_path, client_current=None):
+    key = (bucket.name, blob_path)
+    cached = cache.lookup(key)
+    if cached is not None:
+        data, meta, fresh = cached
+        if fresh:
+            cache.count("hits")
+            if data is not None:
+                return data, meta, None
+            # Pinned to the cached generation, so no metadata call is needed to stream it
+            return None, meta, bucket.blob(blob_path, generation=meta.generation)
+
+    blob = bucket.get_blob(blob_path)
+    if blob is None:
+        if cached is not None:
+            cache.invalidate(key)
+        cache.count("misses")
+        return None
+    if cached is not None and cache.revalidate and blob.generation == cached[1].generation:
+        cache.touch(key)
+        cache.count("revalidations")
+        return cached[0], cached[1], blob
+
+    cache.count("misses")
+    meta = blob_meta(blob)
+    if client_current is not None and client_current(meta):
+        return None, meta, blob
+    if blob.size is not None and blob.size > cache.max_item_bytes:
+        cache.put(key, None, meta)
+        return None, meta, blob
+    data = blob.download_as_bytes()
+    cache.put(key, data, meta)
+    return data, meta, blob
+
+
+# Startup warm-up: lists bucket/prefix once, installs the listing as the manifest of
+# existing objects in `missing`, and downloads the first first_n objects of the listing
+# (GCS lists names in lexicographic order, not by popularity) into `cache` on
+# max_workers threads (only the metadata of files too large to cache). Returns the
+# number of objects listed and prefetched.
+def warm_up(cache, missing, bucket, prefix, first_n=1000, max_workers=16):
+    blobs = list(bucket.list_blobs(prefix=prefix))
+    missing.set_listing(bucket.name, prefix, set(blob.name for blob in blobs))
+    missing.watch(bucket, prefix)
+
+    def prefetch(blob):
+        data = None
+        if blob.size is None or blob.size <= cache.max_item_bytes:
+            data = blob.download_as_bytes()
+        cache.put((bucket.name, blob.name), data, blob_meta(blob))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        prefetched = sum(1 for _ in executor.map(prefetch, blobs[:first_n]))
+    return len(blobs), prefetched
@@ -0,0 +1,181 @@
+import atexit
+import threading
+import time
+from google.cloud import pubsub_v1
+from google.cloud.pubsub_v1.publisher.exceptions import FlowControlLimitError
+from google.cloud.pubsub_v1.types import BatchSettings, LimitExceededBehavior, PublisherOptions, PublishFlowControl
+
+
+# Publishes events to a Pub/Sub topic without making the request thread wait for them
+# The client library batches messages (max_messages / max_bytes / max_latency seconds,
+# whichever is reached first) and sends each batch from its own threads. At most
+# max_outstanding messages may be unacknowledged by Pub/Sub at once; beyond that
+# publish() drops the message instead of queueing it, so a flood of events can't grow
+# memory without bound. A done-callback counts every message as published or failed.
+# With fire_and_forget off, publish() waits for the message ID like the original code.
+# The client honours PUBSUB_EMULATOR_HOST, so the same code runs against the emulator.
+class EventPublisher:
+
+    def __init__(self, project_id, topic_id, logger=None, max_messages=100, max_bytes=1024 * 1024,
+                 max_latency=0.05, max_outstanding=1000, fire_and_forget=True):
+        batch_settings = BatchSettings(max_messages=max_messages, max_bytes=max_bytes, max_latency=max_latency)
+        flow_control = PublishFlowControl(message_limit=max_outstanding, limit_exceeded_behavior=LimitExceededBehavior.ERROR)
+        self.client = pubsub_v1.PublisherClient(batch_settings=batch_settings, publisher_options=PublisherOptions(flow_control=flow_control))
+        self.topic_path = self.client.topic_path(project_id, topic_id)
+        self.logger = logger
+        self.fire_and_forget = fire_and_forget
+        self.lock = threading.Lock()
+        self.submitted = 0
+        self.published = 0
+        self.failed = 0
+        self.dropped = 0
+        # Batches still pending at interpreter exit are sent before the process ends
+        atexit.register(self.close)
+
+    # Hands a message to the client and returns at once (or after it was sent, if not
+    # fire_and_forget). Returns False if it was dropped because too many are outstanding.
+    def publish(self, message, **attributes):
+        try:
+            future = self.client.publish(self.topic_path, message.encode("utf-8"), **attributes)
+        except FlowControlLimitError:
+            self.count("dropped")
+            return False
+        # Recent client versions report the limit through an already failed future
+        if future.done() and isinstance(future.exception(), FlowControlLimitError):
+            self.count("dropped")
+            return False
+        self.count("submitted")
+        future.add_done_callback(self.on_done)
+        if not self.fire_and_forget:
+            future.result()
+        return True
+
+    # Runs on a client thread once Pub/Sub has acknowledged or rejected the message
+    def on_done(self, future):
+        error = future.exception()
+        if error is None:
+            self.count("published")
+            return
+        self.count("failed")
+        if self.logger is not None:
+            self.logger.log_text("Error publishing message: {}".format(error), severity='ERROR')
+
+    # Sends any pending batches and waits for them; publish() can't be used afterwards
+    def close(self):
+        self.client.stop()
+
+    def count(self, counter):
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self):
+        with self.lock:
+            return {"submitted": self.submitted, "published": self.published, "failed": self.failed,
+                    "dropped": self.dropped, "outstanding": self.submitted - self.published - self.failed}
+
+
+# Stand-in for EventPublisher that sends nothing, for running without Pub/Sub credentials
+# (e.g. benchmarks); every message counts as published at once
+class NullPublisher:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.published = 0
+
+    def publish(self, message, **attributes):
+        with self.lock:
+            self.published += 1
+        return True
+
+    def stats(self):
+        with self.lock:
+            return {"submitted": self.published, "published": self.published, "failed": 0, "dropped": 0, "outstanding": 0}
+
+
+# Coalesces forbidden requests into one message per country per time window
+# record() only bumps a counter under a lock. Every `window` seconds a background thread
+# publishes one message per country seen in that window, with the request count and up
+# to max_samples distinct client IPs, so an attack costs a handful of messages instead
+# of one per request. The text reads like the per-request messages did; the count,
+# window and samples are also set as message attributes for consumers that parse them.
+# With background off there is no thread: the caller runs flush_if_expired() itself, e.g.
+# at the end of each Cloud Function invocation, where no CPU is given between requests.
+# A country's first request in each window is then published at once, so a short burst
+# is always reported; the rest of that window waits for a later flush, and is lost if
+# the process ends before one runs.
+class ForbiddenEventAggregator:
+
+    def __init__(self, publisher, window=10.0, max_samples=5, background=True):
+        self.publisher = publisher
+        self.window = window
+        self.max_samples = max_samples
+        self.lock = threading.Lock()
+        self.counts = {}
+        self.samples = {}
+        self.window_start = time.time()
+        self.recorded = 0
+        self.messages = 0
+        self.publish_first = not background
+        # Countries whose first request in this window was already published on its own
+        self.reported = set()
+        if background:
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+            # Whatever was recorded in the last partial window is sent before the process ends
+            atexit.register(self.flush)
+
+    def record(self, country, client_ip=None):
+        with self.lock:
+            self.recorded += 1
+            first = self.publish_first and country not in self.reported
+            if first:
+                self.reported.add(country)
+                self.messages += 1
+            else:
+                self.counts[country] = self.counts.get(country, 0) + 1
+                samples = self.samples.setdefault(country, [])
+                if client_ip and len(samples) < self.max_samples and client_ip not in samples:
+                    samples.append(client_ip)
+        if first:
+            now = time.time()
+            try:
+                self.publish_count(country, 1, [client_ip] if client_ip else [], now, now)
+            except Exception as e:
+                print(f"Error publishing forbidden event: {e}")
+
+    # Publishes the current window's counts and starts a new window
+    # With if_expired, does nothing unless the window has ended; returns whether it flushed
+    def flush(self, if_expired=False):
+        with self.lock:
+            if if_expired and time.time() - self.window_start < self.window:
+                return False
+            counts, samples = self.counts, self.samples
+            self.counts, self.samples = {}, {}
+            self.reported = set()
+            window_start, window_end = self.window_start, time.time()
+            self.window_start = window_end
+            self.messages += len(counts)
+        for country, count in counts.items():
+            self.publish_count(country, count, samples[country], window_start, window_end)
+        return True
+
+    def publish_count(self, country, count, samples, window_start, window_end):
+        message = "Forbidden request from {} x{} in {:.0f}s, sample IPs: {}".format(
+            country, count, window_end - window_start, ", ".join(samples) or "none")
+        self.publisher.publish(message, country=country, count=str(count), sample_ips=",".join(samples),
+                               window_start=str(window_start), window_end=str(window_end))
+
+    def flush_if_expired(self):
+        return self.flush(if_expired=True)
+
+    def run(self):
+        while True:
+            time.sleep(self.window)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error publishing aggregated events: {e}")
+
+    def stats(self):
+        with self.lock:
+            return {"recorded": self.recorded, "aggregated_messages": self.messages, "pending_countries": len(self.counts)}
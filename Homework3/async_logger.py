@@ -0,0 +1,147 @@
+import atexit
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+
+# Writes each batch of entries to a Cloud Logging logger in a single API call
+class CloudLoggingSink:
+
+    def __init__(self, logger):
+        self.logger = logger
+
+    def write(self, entries):
+        batch = self.logger.batch()
+        for kind, payload, severity, timestamp in entries:
+            if kind == "struct":
+                batch.log_struct(payload, severity=severity, timestamp=timestamp)
+            else:
+                batch.log_text(payload, severity=severity, timestamp=timestamp)
+        batch.commit()
+
+
+# Keeps written entries in memory, for tests and local runs without Cloud Logging
+# `delay` simulates the latency of one batch write
+class MemorySink:
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.entries = []
+        self.batches = 0
+        self.lock = threading.Lock()
+
+    def write(self, entries):
+        if self.delay:
+            time.sleep(self.delay)
+        with self.lock:
+            self.entries.extend(entries)
+            self.batches += 1
+
+
+# Drop-in replacement for a Cloud Logging logger that never blocks the request thread
+# log_text/log_struct only put an entry on a bounded queue; a background thread writes
+# them to `sink` in batches of up to batch_size, or after flush_interval seconds,
+# whichever comes first. When the queue is full, `policy` decides what gives:
+# "drop_newest" discards the new entry, "drop_oldest" the oldest queued one, and "block"
+# waits up to block_timeout seconds for room before dropping. Every drop is counted.
+class AsyncLogger:
+
+    POLICIES = ("drop_newest", "drop_oldest", "block")
+
+    def __init__(self, sink, max_queue=10000, batch_size=500, flush_interval=1.0, policy="drop_newest", block_timeout=0.1):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown policy {policy!r}, expected one of {self.POLICIES}")
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.lock = threading.Lock()
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        # Entries still queued at interpreter exit are written before the process ends
+        atexit.register(self.flush)
+
+    def log_text(self, text, severity="DEFAULT"):
+        self.enqueue(("text", text, severity, datetime.now(timezone.utc)))
+
+    def log_struct(self, info, severity="DEFAULT"):
+        self.enqueue(("struct", info, severity, datetime.now(timezone.utc)))
+
+    def enqueue(self, entry):
+        try:
+            if self.policy == "block":
+                self.queue.put(entry, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(entry)
+            self.count("enqueued")
+            return
+        except queue.Full:
+            pass
+        if self.policy == "drop_oldest":
+            try:
+                self.queue.get_nowait()
+                self.queue.put_nowait(entry)
+                self.count("enqueued")
+            except (queue.Empty, queue.Full):
+                pass
+        self.count("dropped")
+
+    def count(self, counter, n=1):
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + n)
+
+    # Blocks until everything queued before the call has been written, or timeout seconds
+    # Returns False on timeout
+    def flush(self, timeout=5.0):
+        done = threading.Event()
+        try:
+            self.queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def run(self):
+        while True:
+            batch = []
+            marker = None
+            item = self.queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if isinstance(item, threading.Event):
+                    marker = item
+                    break
+                batch.append(item)
+                remaining = deadline - time.monotonic()
+                if len(batch) >= self.batch_size or remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if batch:
+                self.write(batch)
+            if marker is not None:
+                marker.set()
+
+    def write(self, batch):
+        try:
+            self.sink.write(batch)
+            self.count("written", len(batch))
+            self.count("batches")
+        except Exception as e:
+            self.count("errors")
+            self.count("dropped", len(batch))
+            print(f"Error writing {len(batch)} log entries: {e}")
+
+    def stats(self):
+        with self.lock:
+            return {"enqueued": self.enqueued, "dropped": self.dropped, "written": self.written,
+                    "batches": self.batches, "write_errors": self.errors, "queued": self.queue.qsize()}
@@ -4,14 +4,14 @@ from flask import request, send_file, Response
 from google.cloud import storage
 from google.cloud import pubsub_v1
 from google.cloud.logging import Client as LoggingClient
+from async_logger import AsyncLogger, CloudLoggingSink
+from event_publisher import EventPublisher, ForbiddenEventAggregator
 import traceback
 import google.cloud.logging
 
-# Initialize the Google Cloud Pub/Sub publisher client
-publisher = pubsub_v1.PublisherClient()
+# Pub/Sub topic for forbidden-request events
 project_id = "ds-561-first-project"
 topic_id = "serena_topic"
-topic_path = publisher.topic_path(project_id, topic_id)
 subscription_id = "serena_topic-sub"
 
 # Initialize the Google Cloud Pub/Sub subscriber client
@@ -20,8 +20,19 @@ subscription_path = subscriber.subscription_path(project_id, subscription_id)
 
 
 # Initialize the Google Cloud Logging client
+# Log calls only enqueue; a background thread writes the entries to Cloud Logging in
+# batches, and accept_requests waits for each invocation's batch before returning
 client = LoggingClient()
-logger = client.logger('homework3_logger')
+logger = AsyncLogger(CloudLoggingSink(client.logger('homework3_logger')))
+
+# A Cloud Function gets no CPU between invocations and its atexit hooks may never run,
+# so nothing is left for a background thread: each publish waits for its message ID
+publisher = EventPublisher(project_id, topic_id, logger=logger, fire_and_forget=False)
+# A country's first forbidden request in each 10-second window is published right away;
+# later ones are counted, and the first invocation after the window ends publishes the
+# counts before returning. If the instance is reclaimed before such an invocation, the
+# counts of that last window are lost.
+forbidden_events = ForbiddenEventAggregator(publisher, window=10, background=False)
 
 
 Banned_Countries = ["north korea", "iran", "cuba", "myanmar", "iraq", "libya", "sudan", "zimbabwe", "syria"]
@@ -32,6 +43,20 @@ Banned_Countries = ["north korea", "iran", "cuba", "myanmar", "iraq", "libya", "
 # based on the file name in the request
 @functions_framework.http
 def accept_requests(request):
+    try:
+        return handle_request(request)
+    finally:
+        # Runs inside the invocation, while the function still has CPU
+        try:
+            forbidden_events.flush_if_expired()
+        except Exception as e:
+            logger.log_text(f"Error publishing aggregated events: {e}", severity='ERROR')
+        # Writes this invocation's entries as one batch before the response is returned;
+        # left queued, they could be lost when the instance is frozen or reclaimed
+        logger.flush()
+
+
+def handle_request(request):
     
     # Log the entire request 
     logger.log_text(f"Received request: {request}", severity='INFO')
@@ -59,13 +84,8 @@ def accept_requests(request):
 
     if country.lower().strip() in Banned_Countries:
         logger.log_text(f'Forbidden Country: {country}', severity='ERROR')
-        message = f"Forbidden request from {country}"
-        logger.log_text("Attempting to publish message...", severity='INFO')
-        publish_future = publisher.publish(topic_path, message.encode("utf-8"))
-        #u need to trigger the publishing with .result()
-        publish_future.result()
-        logger.log_text("Message publishing initiated", severity='INFO') 
-        logger.log_text(f"Message with ID {publish_future.result()} published successfully.", severity='INFO')
+        # Counted here; one message per country is published at the end of the window
+        forbidden_events.record(country, original_ip)
 
         return "FORBIDDEN COUNTRY", 400
     